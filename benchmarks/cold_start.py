@@ -0,0 +1,179 @@
+"""Worker cold start: startup phases, import times and time to first response.
+
+Phases: a fresh interpreter run with ``-X importtime`` times settings
+evaluation, the app registry (django.setup), the WSGI handler (middleware
+chain) and each core.warmup step, and reports the slowest modules and
+top-level packages by import time. Medians over --runs interpreters.
+
+First response: gunicorn is started with GUNICORN_PRELOAD=0 and =1 and the
+time from spawn until GET --path answers is measured, along with the latency
+of that first request and of the next one. Uses the database of the current
+DJANGO_SETTINGS_MODULE.
+
+    python -m benchmarks.cold_start --runs 5 --top 20
+    python -m benchmarks.cold_start --workers 2 --json cold_start.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+# ----------------------------
+# Startup phases (child interpreter)
+# ----------------------------
+def phases():
+    """Time each startup phase in this (fresh) process; nothing is imported yet."""
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smartcoach.settings')
+    timings = {}
+
+    def timed(name, step):
+        started = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - started
+
+    timed('import django', lambda: __import__('django'))
+    from django.conf import settings
+
+    timed('settings', lambda: settings.INSTALLED_APPS)
+    import django
+
+    timed('app registry', django.setup)
+    from django.core.handlers.wsgi import WSGIHandler
+
+    timed('wsgi handler', WSGIHandler)
+    from core import warmup
+
+    timed('warm-up: urls', warmup.load_urls)
+    timed('warm-up: templates', warmup.load_templates)
+    timed('warm-up: databases', warmup.connect_databases)
+    return timings
+
+
+def parse_importtime(output):
+    """``{module: (self_seconds, cumulative_seconds)}`` from ``-X importtime`` output."""
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us) / 1e6, int(cumulative_us) / 1e6)
+    return modules
+
+
+def run_phases(runs):
+    timings, imports = defaultdict(list), defaultdict(list)
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-m', 'benchmarks.cold_start', '--child'],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        for name, seconds in json.loads(result.stdout.splitlines()[-1]).items():
+            timings[name].append(seconds)
+        for module, (own, _) in parse_importtime(result.stderr).items():
+            imports[module].append(own)
+    phase_medians = {name: statistics.median(values) for name, values in timings.items()}
+    module_medians = {module: statistics.median(values) for module, values in imports.items()}
+    return phase_medians, module_medians
+
+
+# ----------------------------
+# Time to first response
+# ----------------------------
+def first_response(args, preload):
+    import requests
+
+    env = dict(os.environ, GUNICORN_PRELOAD='1' if preload else '0')
+    command = [
+        'gunicorn', 'smartcoach.wsgi', '--bind', f'127.0.0.1:{args.port}',
+        '--workers', str(args.workers), '--log-level', 'warning',
+    ]
+    url = f'http://127.0.0.1:{args.port}{args.path}'
+    spawned = time.perf_counter()
+    server = subprocess.Popen(command, cwd=ROOT, env=env)
+    try:
+        while True:
+            if server.poll() is not None:
+                raise SystemExit("gunicorn exited during startup")
+            if time.perf_counter() - spawned > 60:
+                raise SystemExit("no response within 60s")
+            sent = time.perf_counter()
+            try:
+                requests.get(url, timeout=60)
+            except requests.ConnectionError:
+                time.sleep(0.01)
+                continue
+            answered = time.perf_counter()
+            break
+        second = time.perf_counter()
+        requests.get(url, timeout=60)
+        return {
+            'first_response': answered - spawned,
+            'first_request': answered - sent,
+            'second_request': time.perf_counter() - second,
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help="Modules and packages to list.")
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--path', default='/login/')
+    parser.add_argument('--skip-server', action='store_true', help="Only measure the startup phases.")
+    parser.add_argument('--json', help="Also write the results to this file.")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(phases()))
+        return
+
+    phase_times, modules = run_phases(args.runs)
+    print(f"startup phases (median of {args.runs} interpreters)")
+    for name, seconds in phase_times.items():
+        print(f"  {name:<20} {seconds * 1000:>8.1f} ms")
+    print(f"  {'total':<20} {sum(phase_times.values()) * 1000:>8.1f} ms")
+
+    packages = defaultdict(float)
+    for module, seconds in modules.items():
+        packages[module.split('.')[0]] += seconds
+    print("\nslowest packages (self import time summed)")
+    for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {package:<40} {seconds * 1000:>8.1f} ms")
+    print("\nslowest modules (self import time)")
+    for module, seconds in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {module:<40} {seconds * 1000:>8.1f} ms")
+
+    responses = {}
+    if not args.skip_server:
+        print(f"\ntime to first response (gunicorn, {args.workers} worker(s), GET {args.path})")
+        print(f"  {'mode':<10} {'first response':>15} {'first request':>14} {'second request':>15}")
+        for preload in (False, True):
+            mode = 'preload' if preload else 'lazy'
+            responses[mode] = result = first_response(args, preload)
+            print(f"  {mode:<10} {result['first_response'] * 1000:>12.1f} ms {result['first_request'] * 1000:>11.1f} ms "
+                  f"{result['second_request'] * 1000:>12.1f} ms")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            'phases': phase_times,
+            'packages': dict(sorted(packages.items(), key=lambda item: -item[1])[:args.top]),
+            'first_response': responses,
+        }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
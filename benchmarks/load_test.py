@@ -0,0 +1,378 @@
+"""Mixed passenger/staff/admin load against a locally started gunicorn.
+
+Creates a throwaway test database (as Django's test runner would), seeds a
+LOADTEST train with coaches plus loadtest_* users with a random per-run
+password, starts gunicorn on it with a temporary settings overlay (emails go
+to Django's dummy backend, uploads to a temp MEDIA_ROOT, the login throttle is
+off) and runs virtual users for a fixed time. Each virtual user repeats one
+scenario:
+
+    passenger  log in, dashboard, train search, coach list, report defects on
+               2-3 coaches with photos, My Defects
+    staff      staff dashboard, claim work orders, move them to In Progress
+               and Resolved, My work orders
+    admin      admin dashboard, trend JSON, SLA JSON
+
+Prints requests, errors, throughput and p50/p95/p99 latency per endpoint.
+The test database is dropped afterwards. On SQLite concurrent reports fail
+with "database is locked"; use PostgreSQL.
+
+--url loads a server that is already running, which uses its own database.
+The fixtures are then written to the configured database, so that database
+must be marked as disposable by setting LOAD_TEST_DATABASE to its NAME. The
+server must also run with LOGIN_THROTTLE_ENABLED = False. Seeded rows are
+deleted afterwards unless --keep-data is given.
+
+    python -m benchmarks.load_test --users 30 --duration 60 --workers 4
+    python -m benchmarks.load_test --workers 2 --worker-class gthread --threads 8 --json gthread.json
+"""
+import argparse
+import io
+import json
+import os
+import random
+import secrets
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smartcoach.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import requests  # noqa: E402
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.contrib.auth.models import Group, User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_databases, teardown_databases  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from core.models import Coach, DefectType, PassengerProfile, Train  # noqa: E402
+
+TRAIN_NUMBER = 'LOADTEST'
+OVERLAY = """from {base} import *  # noqa
+
+DATABASES['default']['NAME'] = {database!r}
+EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.dummy.EmailBackend'
+MEDIA_ROOT = {media!r}
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+# Every virtual user logs in from 127.0.0.1.
+LOGIN_THROTTLE_ENABLED = False
+"""
+
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+def test_database(workdir):
+    """Create and migrate a throwaway database; returns the config to tear down.
+
+    SQLite test databases default to in-memory, which gunicorn could not
+    share, so the file goes into ``workdir``.
+    """
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = str(workdir / 'loadtest.sqlite3')
+    return setup_databases(verbosity=0, interactive=False)
+
+
+def check_configured_database():
+    name = str(connection.settings_dict['NAME'])
+    if os.environ.get('LOAD_TEST_DATABASE') != name:
+        raise SystemExit(
+            f"--url writes fixtures to the configured database {name!r}. "
+            f"Set LOAD_TEST_DATABASE={name} if it is disposable."
+        )
+
+
+def seed(args, password):
+    password = make_password(password)
+    train, _ = Train.objects.get_or_create(number=TRAIN_NUMBER, defaults={'name': 'Load Test Express'})
+    coaches = [
+        Coach.objects.get_or_create(train=train, coach_number=f'L{i}', defaults={'coach_type': 'SL'})[0]
+        for i in range(1, args.coaches + 1)
+    ]
+    defect_types = list(
+        DefectType.objects.filter(is_active=True, ac_only=False).exclude(name=DefectType.OTHER).values_list('id', flat=True)
+    )
+
+    def users(role, count, **extra):
+        created = []
+        for i in range(count):
+            user, _ = User.objects.get_or_create(username=f'loadtest_{role}_{i}', defaults=extra)
+            user.password = password
+            user.save(update_fields=['password'])
+            created.append(user.username)
+        return created
+
+    passengers = users('passenger', args.users)
+    Group.objects.get_or_create(name='Passenger')[0].user_set.add(*User.objects.filter(username__in=passengers))
+    for user in User.objects.filter(username__in=passengers, passengerprofile__isnull=True):
+        PassengerProfile.objects.create(user=user, gender='other')
+    staff = users('staff', args.users)
+    Group.objects.get_or_create(name='Maintenance Staff')[0].user_set.add(*User.objects.filter(username__in=staff))
+    admins = users('admin', args.users, is_superuser=True, is_staff=True)
+
+    return {
+        'train_id': train.id,
+        'coach_ids': [coach.id for coach in coaches],
+        'defect_type_ids': defect_types,
+        'users': {'passenger': passengers, 'staff': staff, 'admin': admins},
+    }
+
+
+def cleanup():
+    Train.objects.filter(number=TRAIN_NUMBER).delete()
+    User.objects.filter(username__startswith='loadtest_').delete()
+
+
+def sample_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (640, 480), (120, 80, 40)).save(buffer, 'JPEG', quality=80)
+    return buffer.getvalue()
+
+
+# ----------------------------
+# Server
+# ----------------------------
+def start_server(args, workdir):
+    base = os.environ['DJANGO_SETTINGS_MODULE']
+    (workdir / 'loadtest_settings.py').write_text(OVERLAY.format(
+        base=base, database=str(connection.settings_dict['NAME']), media=str(workdir / 'media'),
+    ))
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE='loadtest_settings',
+        PYTHONPATH=os.pathsep.join([str(workdir), str(ROOT), os.environ.get('PYTHONPATH', '')]),
+    )
+    command = [
+        'gunicorn', 'smartcoach.wsgi', '--bind', f'127.0.0.1:{args.port}',
+        '--workers', str(args.workers), '--worker-class', args.worker_class, '--threads', str(args.threads),
+        '--log-level', 'warning',
+    ]
+    server = subprocess.Popen(command, cwd=ROOT, env=env)
+    url = f'http://127.0.0.1:{args.port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f'{url}/login/', timeout=5)
+            return server, url
+        except requests.RequestException:
+            if server.poll() is not None:
+                break
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("gunicorn did not start")
+
+
+# ----------------------------
+# Virtual users
+# ----------------------------
+class VirtualUser:
+    def __init__(self, url, username, fixtures, results, image):
+        self.url = url
+        self.username = username
+        self.fixtures = fixtures
+        self.results = results
+        self.image = image
+        self.session = None
+
+    def new_session(self):
+        self.session = requests.Session()
+
+    def request(self, name, method, path, **kwargs):
+        kwargs.setdefault('allow_redirects', False)
+        if method == 'POST':
+            kwargs.setdefault('data', {})['csrfmiddlewaretoken'] = self.session.cookies.get('csrftoken', '')
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.url + path, timeout=60, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        self.results.append((name, time.perf_counter() - started, ok))
+        return response
+
+    def login(self):
+        self.new_session()
+        self.request('login_page', 'GET', '/login/')
+        self.request('login', 'POST', '/login/', data={'username': self.username, 'password': self.fixtures['password']})
+
+    def passenger(self):
+        self.login()
+        fixtures = self.fixtures
+        self.request('passenger_dashboard', 'GET', '/passenger-dashboard/')
+        self.request('train_search', 'GET', '/trains/search/', params={'q': TRAIN_NUMBER[:random.randint(1, 4)]})
+        self.request('report_coaches', 'GET', f"/report-defect/coaches/{fixtures['train_id']}/")
+
+        coaches = random.sample(fixtures['coach_ids'], random.randint(2, 3))
+        data = {'train': fixtures['train_id'], 'selected_coaches': coaches}
+        files = {}
+        for coach_id in coaches:
+            data[f'defects_{coach_id}'] = random.sample(fixtures['defect_type_ids'], random.randint(1, 2))
+            files[f'image_{coach_id}'] = (f'coach_{coach_id}.jpg', self.image, 'image/jpeg')
+        self.request('report_defect', 'POST', '/report-defect/', data=data, files=files)
+        self.request('my_defects', 'GET', '/my-defects/')
+
+    def staff(self):
+        if self.session is None:
+            self.login()
+        self.request('staff_dashboard', 'GET', '/staff-dashboard/')
+        response = self.request('claim', 'POST', '/staff-dashboard/claim/',
+                                data={'count': 5, 'train': self.fixtures['train_id']})
+        claimed = [d['id'] for d in response.json()['claimed']] if response is not None and response.ok else []
+        if claimed:
+            for status in ('In Progress', 'Resolved'):
+                self.request('bulk_update', 'POST', '/staff-dashboard/bulk-update/',
+                             data={'status': status, 'defect_ids': claimed})
+        self.request('my_work_orders', 'GET', '/staff-dashboard/', params={'mine': 1})
+
+    def admin(self):
+        if self.session is None:
+            self.login()
+        self.request('admin_dashboard', 'GET', '/admin-dashboard/')
+        self.request('trends', 'GET', '/admin-dashboard/trends/',
+                     params={'granularity': random.choice(['day', 'week', 'month'])})
+        self.request('sla_report', 'GET', '/admin-dashboard/sla/')
+
+
+def run_user(role, user, deadline):
+    scenario = getattr(user, role)
+    while time.monotonic() < deadline:
+        scenario()
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        role, _, weight = part.partition('=')
+        if role not in ('passenger', 'staff', 'admin'):
+            raise argparse.ArgumentTypeError(f"unknown role {role!r}")
+        mix[role] = float(weight)
+    return mix
+
+
+# ----------------------------
+# Report
+# ----------------------------
+def percentile(sorted_values, q):
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(results, elapsed):
+    by_endpoint = defaultdict(list)
+    errors = defaultdict(int)
+    for name, seconds, ok in results:
+        by_endpoint[name].append(seconds)
+        errors[name] += not ok
+
+    rows = []
+    for name in sorted(by_endpoint):
+        timings = sorted(by_endpoint[name])
+        rows.append({
+            'endpoint': name,
+            'requests': len(timings),
+            'errors': errors[name],
+            'rps': round(len(timings) / elapsed, 2),
+            'p50_ms': round(percentile(timings, 0.50) * 1000, 1),
+            'p95_ms': round(percentile(timings, 0.95) * 1000, 1),
+            'p99_ms': round(percentile(timings, 0.99) * 1000, 1),
+            'mean_ms': round(statistics.mean(timings) * 1000, 1),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20, help="Concurrent virtual users.")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('passenger=6,staff=3,admin=1'),
+                        help="Share of virtual users per role, e.g. passenger=6,staff=3,admin=1.")
+    parser.add_argument('--duration', type=float, default=30, help="Seconds of load after warm-up.")
+    parser.add_argument('--coaches', type=int, default=12)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--worker-class', default='sync')
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--url', help="Load an already running server instead of starting gunicorn.")
+    parser.add_argument('--json', help="Also write the results to this file.")
+    parser.add_argument('--keep-data', action='store_true', help="With --url, leave the seeded rows in place.")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix='smartcoach-load-'))
+    if args.url:
+        check_configured_database()
+        old_config = None
+    else:
+        old_config = test_database(workdir)
+    password = secrets.token_urlsafe(16)
+    fixtures = dict(seed(args, password), password=password)
+    server = None
+    try:
+        if args.url:
+            url = args.url.rstrip('/')
+        else:
+            server, url = start_server(args, workdir)
+
+        total_weight = sum(args.mix.values())
+        roles = []
+        for role, weight in args.mix.items():
+            roles += [role] * round(args.users * weight / total_weight)
+        image = sample_image()
+        results = []
+        users, per_role = [], Counter()
+        for role in roles:
+            users.append(VirtualUser(url, fixtures['users'][role][per_role[role]], fixtures, results, image))
+            per_role[role] += 1
+
+        started = time.monotonic()
+        deadline = started + args.duration
+        threads = [
+            threading.Thread(target=run_user, args=(role, user, deadline), daemon=True)
+            for role, user in zip(roles, users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        if old_config is not None:
+            teardown_databases(old_config, verbosity=0)
+        elif not args.keep_data:
+            cleanup()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    rows = summarize(results, elapsed)
+    mix = ', '.join(f'{role}={roles.count(role)}' for role in args.mix)
+    print(f"server={'external' if args.url else f'gunicorn {args.worker_class} x{args.workers} threads={args.threads}'} "
+          f"users={len(roles)} ({mix}) duration={elapsed:.1f}s")
+    print(f"{'endpoint':<20} {'requests':>8} {'errors':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for row in rows:
+        print(f"{row['endpoint']:<20} {row['requests']:>8} {row['errors']:>6} {row['rps']:>7} "
+              f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}")
+    total = sum(row['requests'] for row in rows)
+    print(f"{'total':<20} {total:>8} {sum(row['errors'] for row in rows):>6} {total / elapsed:>7.2f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            'workers': args.workers, 'worker_class': args.worker_class, 'threads': args.threads,
+            'users': len(roles), 'duration': elapsed, 'endpoints': rows,
+        }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Recent-window Defect query latency as history grows.
+
+Seeds a throwaway test database with N months of synthetic defects, step by
+step, and times the staff-queue style "last 30 days" query after each step.
+On PostgreSQL (core_defect partitioned by month) the latency should stay flat
+because old partitions are pruned; the plan column shows how many partitions
+were scanned.
+
+    python -m benchmarks.partition_pruning --steps 6 12 24 48 --rows-per-month 5000
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smartcoach.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_databases, teardown_databases  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from core.models import Coach, Defect, DefectType, Train  # noqa: E402
+from core.partitions import add_months, ensure_partitions, month_start, recent_range  # noqa: E402
+
+WINDOW_DAYS = 30
+
+
+@contextmanager
+def explicit_date_reported():
+    field = Defect._meta.get_field('date_reported')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def seed_months(first, last, rows_per_month, coaches, defect_types, user):
+    """Insert rows_per_month defects into each month offset in [first, last)."""
+    now = timezone.now()
+    ensure_partitions(now - timedelta(days=31 * last), add_months(month_start(now), 2))
+    with explicit_date_reported():
+        for offset in range(first, last):
+            base = now - timedelta(days=30 * offset)
+            Defect.objects.bulk_create(
+                [
+                    Defect(
+                        coach=coaches[i % len(coaches)],
+                        defect_type=defect_types[i % len(defect_types)],
+                        reported_by=user,
+                        status='Resolved' if offset else 'Pending',
+                        date_reported=base - timedelta(minutes=i * 43200 // rows_per_month),
+                    )
+                    for i in range(rows_per_month)
+                ],
+                batch_size=2000,
+            )
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_defect')
+
+
+def time_window_query(repeat):
+    since, until = recent_range(WINDOW_DAYS)
+    queryset = (
+        Defect.objects.filter(date_reported__gte=since, date_reported__lt=until)
+        .select_related('coach__train', 'reported_by', 'defect_type')
+        .order_by('-date_reported')
+    )
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(queryset.all())
+        timings.append((time.perf_counter() - start) * 1000)
+
+    plan = queryset.explain()
+    scanned = len(set(re.findall(r' on (core_defect_(?:p\d{6}|default))\b', plan)))
+    return rows, statistics.median(timings), scanned
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--steps', type=int, nargs='+', default=[6, 12, 24, 48],
+                        help="Months of history to measure at, in increasing order.")
+    parser.add_argument('--rows-per-month', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        user = User.objects.create_user('bench_passenger')
+        train = Train.objects.create(number='BENCH', name='Benchmark Express')
+        coaches = [Coach.objects.create(train=train, coach_number=f'B{i}', coach_type='3A') for i in range(1, 11)]
+        defect_types = list(DefectType.objects.all())
+
+        print(f"backend={connection.vendor} window={WINDOW_DAYS}d rows/month={args.rows_per_month}")
+        print(f"{'months':>7} {'total rows':>11} {'window rows':>12} {'median ms':>10} {'partitions':>11}")
+        seeded = 0
+        for months in args.steps:
+            seed_months(seeded, months, args.rows_per_month, coaches, defect_types, user)
+            seeded = months
+            rows, median_ms, scanned = time_window_query(args.repeat)
+            print(f"{months:>7} {months * args.rows_per_month:>11} {rows:>12} {median_ms:>10.2f} {scanned or '-':>11}")
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
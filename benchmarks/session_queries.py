@@ -0,0 +1,81 @@
+"""Database queries per request for each session backend.
+
+Logs a passenger in on a throwaway test database and replays a short visit
+(dashboard, My Defects, report form, a report POST that flashes a message and
+redirects once, to the dashboard) under every SESSION_ENGINE in settings.SESSION_ENGINES, counting
+all queries and the ones against django_session.
+
+    python -m benchmarks.session_queries --visits 20
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smartcoach.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import Group, User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext, setup_databases, setup_test_environment, teardown_databases,
+)
+
+from core.models import PassengerProfile  # noqa: E402
+
+PASSWORD = 'bench-pass-123'
+
+
+def visit(client):
+    client.get('/passenger-dashboard/')
+    client.get('/my-defects/')
+    client.get('/report-defect/')
+    client.post('/report-defect/', {'selected_coaches': '999999'}, follow=True)
+    return 5  # three GETs, the POST and the one redirect it is followed to
+
+
+def measure(engine, visits):
+    cache.clear()
+    with override_settings(SESSION_ENGINE=engine):
+        client = Client()
+        client.login(username='bench_passenger', password=PASSWORD)
+        visit(client)  # warm the session cache and template loaders
+        requests = 0
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(visits):
+                requests += visit(client)
+    session = sum('django_session' in query['sql'] for query in queries.captured_queries)
+    return requests, len(queries), session
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--visits', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        user = User.objects.create_user('bench_passenger', password=PASSWORD, first_name='Bench')
+        user.groups.add(Group.objects.get_or_create(name='Passenger')[0])
+        PassengerProfile.objects.create(user=user, gender='other')
+
+        print(f"backend={connection.vendor} cache={settings.CACHES['default']['BACKEND'].rsplit('.', 1)[-1]} "
+              f"messages={settings.MESSAGE_STORAGE.rsplit('.', 1)[-1]}")
+        print(f"{'session engine':>16} {'requests':>9} {'queries':>8} {'session q':>10} {'per request':>12}")
+        for name, engine in settings.SESSION_ENGINES.items():
+            requests, total, session = measure(engine, args.visits)
+            print(f"{name:>16} {requests:>9} {total:>8} {session:>10} {total / requests:>12.2f}")
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
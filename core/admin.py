@@ -1,7 +1,243 @@
 # Register your models here.
+from collections import Counter
+
 from django.contrib import admin
-from .models import Train, Coach, Defect
+from django.db import transaction
+from .models import (
+    Train, Coach, Defect, DefectCategory, DefectReport, DefectType, DefectStatusEvent, DefectSpike, ArchivedDefect,
+    Depot, StaffProfile, Zone,
+)
+from .fragments import bump
+from .notifications import send_status_update_batch
+from .paginator import EstimatedCountPaginator
+from .workflow import adjust_status_counts, transition_defects
+from .zones import FLEET, scope_defects, scope_depots, scope_trains, staff_scope, sync_train_zone
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables that grow to millions of rows."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class ZoneScopedAdmin:
+    """Limits rows and foreign-key choices to the user's zone/depot (see core.zones).
+
+    ``train_path`` leads from the model to Train; ``defect_path`` (for models
+    reaching Defect) takes precedence when set.
+    """
+    train_path = ''
+    defect_path = None
+
+    def get_queryset(self, request):
+        queryset, scope = super().get_queryset(request), staff_scope(request.user)
+        if self.defect_path is not None:
+            return scope_defects(queryset, scope, self.defect_path)
+        return scope_trains(queryset, scope, self.train_path)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        scope = staff_scope(request.user)
+        if db_field.related_model is Train:
+            kwargs['queryset'] = scope_trains(Train.objects.all(), scope)
+        elif db_field.related_model is Coach:
+            kwargs['queryset'] = scope_trains(Coach.objects.select_related('train'), scope, 'train__')
+        elif db_field.related_model is Depot:
+            kwargs['queryset'] = scope_depots(Depot.objects.select_related('zone'), scope)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class VersionedAdmin:
+    """Bumps the ``versions`` change counters (see core.fragments) on every write,
+    so cached dashboard fragments showing these rows are redrawn.
+    """
+    versions = ()
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        bump(*self.versions)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump(*self.versions)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        bump(*self.versions)
+
+
+@admin.register(Zone)
+class ZoneAdmin(admin.ModelAdmin):
+    list_display = ('code', 'name')
+    search_fields = ('code', 'name')
+
+
+@admin.register(Depot)
+class DepotAdmin(admin.ModelAdmin):
+    list_display = ('code', 'name', 'zone')
+    list_select_related = ('zone',)
+    list_filter = ('zone',)
+    search_fields = ('code', 'name')
+
+
+@admin.register(StaffProfile)
+class StaffProfileAdmin(admin.ModelAdmin):
+    list_display = ('user', 'zone', 'depot')
+    list_select_related = ('user', 'zone', 'depot')
+    list_filter = ('zone',)
+    search_fields = ('user__username',)
+    raw_id_fields = ('user',)
+
+
+@admin.register(Train)
+class TrainAdmin(VersionedAdmin, ZoneScopedAdmin, admin.ModelAdmin):
+    # Train numbers show on coach and defect rows too; deletes cascade to them.
+    versions = ('train', 'coach', 'defect')
+    list_display = ('number', 'name', 'depot')
+    list_select_related = ('depot__zone',)
+    list_filter = ('depot__zone',)
+    search_fields = ('number', 'name')
+    ordering = ('number',)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if 'depot' in form.changed_data:
+            sync_train_zone(obj)
+
+
+@admin.register(Coach)
+class CoachAdmin(VersionedAdmin, ZoneScopedAdmin, LargeTableAdmin):
+    versions = ('coach', 'defect')
+    train_path = 'train__'
+    list_display = ('coach_number', 'coach_type', 'train')
+    list_select_related = ('train',)
+    list_filter = ('coach_type',)
+    search_fields = ('coach_number', 'train__number', 'train__name')
+    autocomplete_fields = ('train',)
+    ordering = ('train__number', 'coach_number')
+
+
+def transition_action(status):
+    """Admin action moving the selected defects to ``status`` through the workflow."""
+    def action(modeladmin, request, queryset):
+        previous_statuses = transition_defects(list(queryset.values_list('id', flat=True)), status, request.user)
+        updated = Defect.objects.filter(id__in=previous_statuses).select_related(
+            'coach__train', 'reported_by', 'defect_type'
+        ).prefetch_related('reports__reported_by')
+        send_status_update_batch(updated, previous_statuses, status)
+        skipped = queryset.count() - len(previous_statuses)
+        modeladmin.message_user(request, f"{len(previous_statuses)} defect(s) moved to '{status}', {skipped} skipped "
+                                         f"(transition not allowed or claimed by someone else).")
+
+    action.__name__ = f"mark_{status.lower().replace(' ', '_')}"
+    action.short_description = f"Move selected defects to {status}"
+    action.allowed_permissions = ('change',)
+    return action
+
+
+@admin.register(Defect)
+class DefectAdmin(VersionedAdmin, ZoneScopedAdmin, LargeTableAdmin):
+    versions = ('defect',)
+    defect_path = ''
+    list_display = ('id', 'coach', 'defect_type', 'status', 'occurrence_count', 'zone', 'reported_by', 'date_reported')
+    list_select_related = ('coach__train', 'defect_type', 'reported_by', 'zone')
+    list_filter = ('status', 'zone', 'defect_type__category')
+    date_hierarchy = 'date_reported'
+    search_fields = ('=id', 'coach__coach_number', 'coach__train__number')
+    autocomplete_fields = ('coach', 'defect_type')
+    raw_id_fields = ('reported_by', 'claimed_by')
+    # Status only moves through the actions below, so the event log, SLA
+    # aggregates and status counts stay in step.
+    readonly_fields = ('status', 'zone')
+    ordering = ('-date_reported',)
+    actions = [
+        transition_action(status) for status in Defect.STATUSES
+        if any(status in targets for targets in Defect.TRANSITIONS.values())
+    ]
+
+    def save_model(self, request, obj, form, change):
+        depot = obj.coach.train.depot
+        obj.zone_id = depot.zone_id if depot else None
+        counts = Counter()
+        if not change:
+            counts[(obj.coach_id, obj.status)] += 1
+        elif 'coach' in form.changed_data:
+            counts[(form.initial['coach'], obj.status)] -= 1
+            counts[(obj.coach_id, obj.status)] += 1
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            adjust_status_counts(counts)
+            if not change:
+                # As record_report does, so the reporter sees it under My Defects.
+                DefectReport.objects.create(defect=obj, reported_by=obj.reported_by)
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, Defect.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        # Keep the per-coach status counters in step with the hot table.
+        removed = Counter()
+        for coach_id, status in queryset.values_list('coach_id', 'status'):
+            removed[(coach_id, status)] -= 1
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            adjust_status_counts(removed)
+
+
+admin.site.register(DefectCategory)
+
+
+@admin.register(DefectType)
+class DefectTypeAdmin(admin.ModelAdmin):
+    list_display = ('name', 'category', 'ac_only', 'is_active')
+    list_select_related = ('category',)
+    list_filter = ('category', 'is_active')
+    search_fields = ('name',)
+
+
+@admin.register(DefectStatusEvent)
+class DefectStatusEventAdmin(ZoneScopedAdmin, LargeTableAdmin):
+    defect_path = 'defect__'
+    list_display = ('defect', 'from_status', 'to_status', 'changed_by', 'created_at')
+    list_select_related = ('defect__coach', 'defect__defect_type', 'defect__reported_by', 'changed_by')
+    list_filter = ('to_status',)
+    raw_id_fields = ('defect', 'changed_by')
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DefectSpike)
+class DefectSpikeAdmin(ZoneScopedAdmin, admin.ModelAdmin):
+    train_path = 'train__'
+    list_display = ('train', 'defect_type', 'bucket_start', 'count', 'expected', 'z_score', 'detected_at')
+    list_select_related = ('train', 'defect_type')
+    list_filter = ('defect_type',)
+    date_hierarchy = 'detected_at'
+
+
+@admin.register(ArchivedDefect)
+class ArchivedDefectAdmin(LargeTableAdmin):
+    list_display = ('defect_id', 'train_number', 'coach_number', 'defect_type', 'reported_by_username', 'date_reported', 'resolved_at')
+    list_filter = ('category',)
+    search_fields = ('train_number', 'coach_number', 'reported_by_username')
+    date_hierarchy = 'date_reported'
+
+    def get_queryset(self, request):
+        # Snapshots keep the train number rather than a foreign key.
+        queryset, scope = super().get_queryset(request), staff_scope(request.user)
+        if scope == FLEET:
+            return queryset
+        return queryset.filter(train_number__in=scope_trains(Train.objects, scope).values('number'))
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
-admin.site.register(Train)
-admin.site.register(Coach)
-admin.site.register(Defect)
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,91 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Max, Q
+
+from .fragments import bump
+from .models import ArchivedDefect, Defect, DefectReport, DefectStatusEvent
+from .workflow import adjust_status_counts
+
+
+# ----------------------------
+# Hot/cold archival of resolved defects
+# ----------------------------
+def archivable_defects(cutoff):
+    """Resolved defects whose resolution (or report, for legacy rows) predates ``cutoff``."""
+    return (
+        Defect.objects.filter(status='Resolved')
+        .annotate(resolved_at=Max('status_events__created_at', filter=Q(status_events__to_status='Resolved')))
+        .filter(Q(resolved_at__lt=cutoff) | Q(resolved_at__isnull=True, date_reported__lt=cutoff))
+        .order_by('id')
+    )
+
+
+def archive_defects(defect_ids):
+    """Copy one batch of resolved defects into ArchivedDefect and drop them from the hot table."""
+    with transaction.atomic():
+        defects = list(
+            Defect.objects.select_for_update(of=('self',))
+            .filter(id__in=defect_ids, status='Resolved')
+            .select_related('coach__train', 'defect_type__category', 'reported_by')
+        )
+        if not defects:
+            return 0
+
+        defect_ids = [d.id for d in defects]
+        history = defaultdict(list)
+        events = DefectStatusEvent.objects.filter(defect_id__in=defect_ids).order_by('created_at')
+        for event in events.values('defect_id', 'from_status', 'to_status', 'changed_by_id', 'created_at'):
+            history[event['defect_id']].append(event)
+        # The reports cascade away with the defect, so keep who filed them.
+        reporters = defaultdict(list)
+        reports = DefectReport.objects.filter(defect_id__in=defect_ids).order_by('reported_at', 'id')
+        for defect_id, user_id, username, reported_at in reports.values_list(
+            'defect_id', 'reported_by_id', 'reported_by__username', 'reported_at',
+        ):
+            reporters[defect_id].append({'user': user_id, 'username': username, 'at': reported_at.isoformat()})
+
+        ArchivedDefect.objects.bulk_create([
+            ArchivedDefect(
+                defect_id=defect.id,
+                train_number=defect.coach.train.number,
+                train_name=defect.coach.train.name,
+                coach_number=defect.coach.coach_number,
+                coach_type=defect.coach.coach_type,
+                defect_type=defect.defect_type.name,
+                category=defect.defect_type.category.name,
+                custom_defect_text=defect.custom_defect_text,
+                description=defect.description,
+                image=defect.image.name or '',
+                reported_by=defect.reported_by,
+                reported_by_username=defect.reported_by.username,
+                occurrence_count=defect.occurrence_count,
+                reporters=reporters[defect.id],
+                date_reported=defect.date_reported,
+                resolved_at=_resolved_at(history[defect.id]),
+                status_history=[
+                    {
+                        'from': event['from_status'],
+                        'to': event['to_status'],
+                        'changed_by': event['changed_by_id'],
+                        'at': event['created_at'].isoformat(),
+                    }
+                    for event in history[defect.id]
+                ],
+            )
+            for defect in defects
+        ], ignore_conflicts=True)
+
+        Defect.objects.filter(id__in=defect_ids).delete()
+        removed = Counter()
+        for defect in defects:
+            removed[(defect.coach_id, defect.status)] -= 1
+        adjust_status_counts(removed)
+        bump('defect')
+
+    return len(defects)
+
+
+def _resolved_at(events):
+    resolved = [event['created_at'] for event in events if event['to_status'] == 'Resolved']
+    return resolved[-1] if resolved else None
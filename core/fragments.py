@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .metrics import cache_lookup
+
+# Models whose writes redraw cached template fragments.
+VERSIONED = ('train', 'coach', 'defect')
+
+
+# ----------------------------
+# Change counters for {% cache %} keys
+# ----------------------------
+def version_key(name):
+    return f"fragments:version:{name}"
+
+
+def versions():
+    """``{name: counter}`` for every versioned model, to vary fragment keys on.
+
+    Read before any fragment's data is queried, so a write racing the render
+    can only leave newer data under an already-retired key.
+    """
+    if not settings.FRAGMENT_CACHE_SECONDS:
+        # Fragment caching is off: nothing to vary on, so skip the round trip.
+        return dict.fromkeys(VERSIONED, 0)
+    keys = {name: version_key(name) for name in VERSIONED}
+    found = cache.get_many(keys.values())
+    cache_lookup('fragment_version', len(found), len(keys) - len(found))
+    for key in set(keys.values()) - set(found):
+        # Seeded from the clock rather than 0, so a counter lost to eviction
+        # or a cache restart never comes back to a key already in use.
+        seed = time.time_ns()
+        cache.add(key, seed, None)
+        found[key] = cache.get(key, seed)
+    return {name: found[key] for name, key in keys.items()}
+
+
+def bump(*names):
+    """Retire the fragments built from ``names`` once the current transaction commits."""
+    if not settings.FRAGMENT_CACHE_SECONDS:
+        return
+
+    def incr():
+        for name in names:
+            try:
+                cache.incr(version_key(name))
+            except ValueError:
+                # Never read yet (or evicted): versions() seeds a fresh one.
+                pass
+
+    transaction.on_commit(incr, robust=True)
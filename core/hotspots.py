@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Defect, DefectHotspot, Train
+from .zones import FLEET, scope_key
+
+
+# ----------------------------
+# Chronic-offender analytics
+# ----------------------------
+def window_counts(windows, now):
+    """Defect counts per (coach, train, defect type), one column per window.
+
+    A single grouped query over the longest window; the shorter windows are
+    conditional counts in the same pass. Returns an int64 array with columns
+    ``coach_id, train_id, defect_type_id, count_<window>...``.
+    """
+    annotations = {
+        f'last_{days}': Count('id', filter=Q(date_reported__gte=now - timedelta(days=days)))
+        for days in windows
+    }
+    rows = list(
+        Defect.objects.filter(date_reported__gte=now - timedelta(days=max(windows)))
+        .values_list('coach_id', 'coach__train_id', 'defect_type_id')
+        .annotate(**annotations)
+        .order_by()
+    )
+    if not rows:
+        return np.empty((0, 3 + len(windows)), dtype=np.int64)
+    return np.array(rows, dtype=np.int64)
+
+
+def rank_groups(group_ids, type_ids, counts, top_n):
+    """Rank coaches or trains by how often the same defect type recurs on them.
+
+    ``counts`` holds one count per (group, type) row; rows for the same pair
+    (several coaches of one train) are summed first. Groups are ordered by
+    repeat count, then total, and only groups with repeats are kept. Returns
+    ``(group_id, total, repeats, top_type_id)`` tuples.
+    """
+    present = counts > 0
+    if not present.any():
+        return []
+    pairs, inverse = np.unique(
+        np.column_stack([group_ids[present], type_ids[present]]), axis=0, return_inverse=True
+    )
+    pair_counts = np.bincount(inverse.ravel(), weights=counts[present], minlength=len(pairs))
+
+    groups, group_index = np.unique(pairs[:, 0], return_inverse=True)
+    group_index = group_index.ravel()
+    totals = np.bincount(group_index, weights=pair_counts, minlength=len(groups))
+    repeats = np.bincount(group_index, weights=np.maximum(pair_counts - 1, 0), minlength=len(groups))
+
+    # Most frequent type per group: sort by (group, count), take each group's last row.
+    order = np.lexsort((pair_counts, group_index))
+    last = np.append(np.flatnonzero(np.diff(group_index[order])), len(order) - 1)
+    top_types = pairs[order[last], 1]
+
+    ranked = np.lexsort((-totals, -repeats))
+    ranked = ranked[repeats[ranked] > 0][:top_n]
+    return [
+        (int(groups[i]), int(totals[i]), int(repeats[i]), int(top_types[i]))
+        for i in ranked
+    ]
+
+
+def areas(train_ids):
+    """``(scope_key, row mask)`` for the fleet and for every zone and depot owning a train in ``train_ids``.
+
+    Each is ranked on its own, so a zone's list is its own top N rather than
+    whatever survived the fleet-wide cut.
+    """
+    owners = {
+        train_id: (zone_id, depot_id)
+        for train_id, zone_id, depot_id in Train.objects.filter(id__in=set(train_ids.tolist()), depot__isnull=False)
+        .values_list('id', 'depot__zone_id', 'depot_id')
+    }
+    # 0 (never a primary key) for rows whose train has no depot.
+    row_owners = np.array([owners.get(train_id, (0, 0)) for train_id in train_ids.tolist()], dtype=np.int64)
+    zone_ids, depot_ids = row_owners.reshape(-1, 2).T
+
+    yield scope_key(FLEET), np.ones(len(train_ids), dtype=bool)
+    for zone_id in sorted({zone_id for zone_id, _ in owners.values()}):
+        yield scope_key((zone_id, None)), zone_ids == zone_id
+    for zone_id, depot_id in sorted(set(owners.values())):
+        yield scope_key((zone_id, depot_id)), depot_ids == depot_id
+
+
+def compute_hotspots(windows=None, top_n=None, now=None):
+    """Rebuild the DefectHotspot table and return the new rows."""
+    windows = windows or settings.HOTSPOT_WINDOW_DAYS
+    top_n = top_n or settings.HOTSPOT_TOP_N
+    now = now or timezone.now()
+
+    data = window_counts(windows, now)
+    coach_ids, train_ids, type_ids = data[:, 0], data[:, 1], data[:, 2]
+    train_of_coach = dict(zip(coach_ids.tolist(), train_ids.tolist()))
+
+    hotspots = []
+    for area, rows in areas(train_ids):
+        for column, days in enumerate(windows, start=3):
+            counts = data[rows, column]
+            for scope, group_ids in ((DefectHotspot.COACH, coach_ids), (DefectHotspot.TRAIN, train_ids)):
+                ranking = rank_groups(group_ids[rows], type_ids[rows], counts, top_n)
+                for rank, (group_id, total, repeats, top_type_id) in enumerate(ranking, start=1):
+                    is_coach = scope == DefectHotspot.COACH
+                    hotspots.append(DefectHotspot(
+                        scope=scope,
+                        area=area,
+                        window_days=days,
+                        rank=rank,
+                        train_id=train_of_coach[group_id] if is_coach else group_id,
+                        coach_id=group_id if is_coach else None,
+                        top_defect_type_id=top_type_id,
+                        defect_count=total,
+                        repeat_count=repeats,
+                        recurrence_score=repeats / total,
+                        computed_at=now,
+                    ))
+
+    with transaction.atomic():
+        DefectHotspot.objects.all().delete()
+        DefectHotspot.objects.bulk_create(hotspots, batch_size=1000)
+    return hotspots
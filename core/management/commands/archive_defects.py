@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.archive import archivable_defects, archive_defects
+
+
+class Command(BaseCommand):
+    help = "Move resolved defects older than --days from the hot Defect table into ArchivedDefect."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.DEFECT_ARCHIVE_AFTER_DAYS,
+                            help="Archive defects resolved more than this many days ago.")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Number of defects moved per transaction.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only report how many defects would be archived.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        if options['dry_run']:
+            count = archivable_defects(cutoff).count()
+            self.stdout.write(f"{count} defect(s) would be archived.")
+            return
+
+        total = 0
+        while True:
+            batch = list(archivable_defects(cutoff).values_list('id', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            total += archive_defects(batch)
+            self.stdout.write(f"Archived {total} defect(s)...")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} resolved defect(s) older than {cutoff:%Y-%m-%d}."))
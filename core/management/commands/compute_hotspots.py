@@ -0,0 +1,24 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.hotspots import compute_hotspots
+
+
+class Command(BaseCommand):
+    help = "Rebuild the coach/train hotspot rankings shown on the admin dashboard. Run from a scheduler."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--windows', type=int, nargs='+', default=settings.HOTSPOT_WINDOW_DAYS,
+                            help="Rolling windows in days.")
+        parser.add_argument('--top-n', type=int, default=settings.HOTSPOT_TOP_N,
+                            help="Coaches and trains kept per window, for the fleet and for each zone and depot.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        hotspots = compute_hotspots(options['windows'], options['top_n'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {len(hotspots)} hotspot(s) for windows {options['windows']} "
+            f"in {time.monotonic() - started:.2f}s."
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.partitions import add_months, ensure_partitions, is_partitioned, month_start
+
+
+class Command(BaseCommand):
+    help = "Create upcoming monthly partitions of core_defect (PostgreSQL only). Run this from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=3,
+                            help="Number of future months to create partitions for.")
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            self.stdout.write("core_defect is not partitioned on this database; nothing to do.")
+            return
+
+        this_month = month_start(timezone.now())
+        created = ensure_partitions(this_month, add_months(this_month, options['months_ahead'] + 1))
+        for name, moved in created.items():
+            if moved:
+                self.stdout.write(f"Created {name} (moved {moved} row(s) out of the DEFAULT partition)")
+            else:
+                self.stdout.write(f"Created {name}")
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} partition(s) created."))
@@ -0,0 +1,166 @@
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.mail import get_connection, send_mass_mail
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import Depot, PassengerProfile, StaffProfile, Zone
+from core.notifications import welcome_message
+from core.zones import FLEET
+
+ROLE_GROUPS = {
+    'passenger': 'Passenger',
+    'staff': 'Maintenance Staff',
+}
+GENDERS = {value for value, _ in PassengerProfile.GENDER_CHOICES}
+
+
+def _init_worker():
+    # Spawned (non-forked) workers need the app registry for the hashers.
+    if not django.apps.apps.ready:
+        django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        "Create passengers and maintenance staff from a CSV with columns "
+        "username,email,password,role[,first_name,last_name,gender,zone,depot]. "
+        "role is 'passenger' or 'staff'; staff rows name the zone and/or depot code they work in."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help="Processes used for password hashing.")
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help="Users inserted per transaction.")
+        parser.add_argument('--skip-email', action='store_true',
+                            help="Do not send welcome emails.")
+        parser.add_argument('--fleet-wide', action='store_true',
+                            help="Let staff rows without a zone or depot see the whole fleet.")
+
+    def handle(self, *args, **options):
+        rows = self.read_rows(options['csv_path'], options['fleet_wide'])
+        existing = set(
+            User.objects.filter(username__in=[row['username'] for row in rows]).values_list('username', flat=True)
+        )
+        skipped = [row['username'] for row in rows if row['username'] in existing]
+        rows = [row for row in rows if row['username'] not in existing]
+        if skipped:
+            self.stdout.write(self.style.WARNING(f"Skipping {len(skipped)} existing username(s)."))
+
+        self.stdout.write(f"Hashing {len(rows)} password(s) with {options['workers']} worker(s)...")
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            hashes = list(pool.map(make_password, [row['password'] for row in rows], chunksize=64))
+
+        groups = {role: Group.objects.get_or_create(name=name)[0] for role, name in ROLE_GROUPS.items()}
+        emails = []
+        size = options['chunk_size']
+        for start in range(0, len(rows), size):
+            chunk = rows[start:start + size]
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(
+                        username=row['username'],
+                        email=row['email'],
+                        first_name=row['first_name'],
+                        last_name=row['last_name'],
+                        password=password_hash,
+                    )
+                    for row, password_hash in zip(chunk, hashes[start:start + size])
+                ])
+                User.groups.through.objects.bulk_create([
+                    User.groups.through(user_id=user.id, group_id=groups[row['role']].id)
+                    for user, row in zip(users, chunk)
+                ])
+                PassengerProfile.objects.bulk_create([
+                    PassengerProfile(user=user, gender=row['gender'])
+                    for user, row in zip(users, chunk)
+                    if row['role'] == 'passenger'
+                ])
+                StaffProfile.objects.bulk_create([
+                    StaffProfile(user=user, zone_id=row['scope'][0], depot_id=row['scope'][1])
+                    for user, row in zip(users, chunk)
+                    if row['scope'] != FLEET
+                ])
+            emails.extend(
+                welcome_message(user, row['password'])
+                for user, row in zip(users, chunk)
+                if user.email
+            )
+            self.stdout.write(f"Created {start + len(chunk)}/{len(rows)} user(s)...")
+
+        if emails and not options['skip_email']:
+            self.send_welcome_emails(emails, size)
+
+        self.stdout.write(self.style.SUCCESS(f"Created {len(rows)} user(s), skipped {len(skipped)}."))
+
+    def read_rows(self, path, fleet_wide=False):
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as handle:
+                rows = list(csv.DictReader(handle))
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+
+        zones = dict(Zone.objects.values_list('code', 'id'))
+        depots = {
+            code: (zone_id, depot_id)
+            for code, zone_id, depot_id in Depot.objects.values_list('code', 'zone_id', 'id')
+        }
+        seen = set()
+        for line, row in enumerate(rows, start=2):
+            # DictReader fills the columns missing from a short row with None.
+            for field in ('username', 'email', 'first_name', 'last_name'):
+                row[field] = (row.get(field) or '').strip()
+            row['password'] = row.get('password') or ''
+            row['role'] = (row.get('role') or '').strip().lower()
+            row['gender'] = (row.get('gender') or 'other').strip().lower()
+            row['zone'] = (row.get('zone') or '').strip()
+            row['depot'] = (row.get('depot') or '').strip()
+            if not row['username'] or not row['password']:
+                raise CommandError(f"Line {line}: username and password are required.")
+            if row['role'] not in ROLE_GROUPS:
+                raise CommandError(f"Line {line}: role must be one of {', '.join(ROLE_GROUPS)}.")
+            if row['role'] == 'passenger' and row['gender'] not in GENDERS:
+                raise CommandError(f"Line {line}: gender must be one of {', '.join(sorted(GENDERS))}.")
+            if row['role'] == 'staff':
+                row['scope'] = self.staff_scope(line, row, zones, depots, fleet_wide)
+            elif row['zone'] or row['depot']:
+                raise CommandError(f"Line {line}: zone and depot only apply to staff.")
+            else:
+                row['scope'] = FLEET
+            if row['username'] in seen:
+                raise CommandError(f"Line {line}: duplicate username {row['username']!r}.")
+            seen.add(row['username'])
+        return rows
+
+    def staff_scope(self, line, row, zones, depots, fleet_wide):
+        """``(zone_id, depot_id)`` named by a staff row; a depot implies its zone."""
+        if row['depot']:
+            if row['depot'] not in depots:
+                raise CommandError(f"Line {line}: unknown depot {row['depot']!r}.")
+            zone_id, depot_id = depots[row['depot']]
+            if row['zone'] and zones.get(row['zone']) != zone_id:
+                raise CommandError(f"Line {line}: depot {row['depot']!r} is not in zone {row['zone']!r}.")
+            return zone_id, depot_id
+        if row['zone']:
+            if row['zone'] not in zones:
+                raise CommandError(f"Line {line}: unknown zone {row['zone']!r}.")
+            return zones[row['zone']], None
+        # Without a profile a staff member sees every zone; make that a choice.
+        if not fleet_wide:
+            raise CommandError(f"Line {line}: staff need a zone or depot (or pass --fleet-wide).")
+        return FLEET
+
+    def send_welcome_emails(self, emails, batch_size):
+        # One SMTP connection for the whole run instead of one per user.
+        connection = get_connection(fail_silently=True)
+        sent = 0
+        for start in range(0, len(emails), batch_size):
+            sent += send_mass_mail(emails[start:start + batch_size], connection=connection)
+        self.stdout.write(f"Sent {sent} welcome email(s).")
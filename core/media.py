@@ -0,0 +1,143 @@
+import mimetypes
+import posixpath
+import re
+import time
+from pathlib import Path
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date
+
+# Only uploaded defect photos (Defect.image upload_to) are served.
+PHOTO_DIR = 'defect_images/'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+signer = signing.Signer(salt='core.media')
+
+
+# ----------------------------
+# Signed URLs
+# ----------------------------
+def link_expiry(now=None):
+    """End of the window after the current one: links last one to two TTLs.
+
+    Everyone gets the same URL within a window, so browsers can reuse it.
+    """
+    ttl = settings.MEDIA_URL_TTL_SECONDS
+    now = time.time() if now is None else now
+    return (int(now) // ttl + 2) * ttl
+
+
+def signed_url(name, now=None):
+    expires = link_expiry(now)
+    query = urlencode({'e': expires, 's': signer.signature(f"{name}:{expires}")})
+    return f"{reverse('media', args=[name])}?{query}"
+
+
+def check_signature(name, expires, signature, now=None):
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    now = time.time() if now is None else now
+    return expires >= now and constant_time_compare(signature or '', signer.signature(f"{name}:{expires}"))
+
+
+class SignedFileSystemStorage(FileSystemStorage):
+    """Local storage whose ``url()`` is a short-lived signed link to the media view."""
+
+    def url(self, name):
+        return signed_url(name)
+
+
+# ----------------------------
+# Serving
+# ----------------------------
+def byte_range(header, size):
+    """Inclusive ``(start, end)`` for a single ``bytes=`` range, else ``None``.
+
+    Malformed and multi-range headers give ``None`` (send the whole file); a
+    range starting past the end comes back with ``start >= size``.
+    """
+    match = RANGE_RE.match(header)
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        return max(0, size - int(last)), size - 1
+    start, end = int(first), min(int(last), size - 1) if last else size - 1
+    return None if last and int(last) < start else (start, end)
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            data = file.read(min(CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def serve_file(request, name):
+    """Conditional, range-aware response for a stored photo.
+
+    With ``MEDIA_OFFLOAD`` set the body is left to the front server, which
+    then also answers Range requests itself.
+    """
+    if not posixpath.normpath(name).startswith(PHOTO_DIR):
+        raise Http404("Photo not found.")
+    path = Path(default_storage.path(name))
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        raise Http404("Photo not found.")
+
+    # Same format as nginx's own ETag, so revalidation works with offloading.
+    etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+    last_modified = http_date(stat.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = file_response(request, name, path, stat.st_size, etag, last_modified)
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    # Stored photos never change; a new upload gets a new name.
+    response['Cache-Control'] = f"private, max-age={settings.MEDIA_CACHE_SECONDS}, immutable"
+    return response
+
+
+def file_response(request, name, path, size, etag, last_modified):
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if settings.MEDIA_OFFLOAD == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_PREFIX + name)
+        return response
+    if settings.MEDIA_OFFLOAD == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = str(path)
+        return response
+
+    header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    requested = byte_range(header, size) if header and if_range in (None, etag, last_modified) else None
+    if requested is None:
+        response = FileResponse(path.open('rb'), content_type=content_type)
+    elif requested[0] >= size:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f"bytes */{size}"
+    else:
+        start, end = requested
+        response = StreamingHttpResponse(read_range(path, start, end - start + 1), status=206,
+                                         content_type=content_type)
+        response['Content-Range'] = f"bytes {start}-{end}/{size}"
+        response['Content-Length'] = end - start + 1
+    response['Accept-Ranges'] = 'bytes'
+    return response
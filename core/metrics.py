@@ -0,0 +1,157 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connection
+from django.db.models import Sum
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# Under gunicorn PROMETHEUS_MULTIPROC_DIR is set (see gunicorn.conf.py) and every
+# worker writes its samples to mmapped files there; the scrape merges them.
+MULTIPROCESS = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+REQUEST_SECONDS = Histogram(
+    'smartcoach_request_duration_seconds', 'Request latency by URL name.',
+    ['view', 'method', 'status'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_QUERIES = Histogram(
+    'smartcoach_request_db_queries', 'Database queries per request.',
+    ['view'], buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250),
+)
+REQUEST_DB_SECONDS = Histogram(
+    'smartcoach_request_db_duration_seconds', 'Time spent in database queries per request.',
+    ['view'], buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+CACHE_REQUESTS = Counter(
+    'smartcoach_cache_requests_total', 'Application cache lookups.', ['cache', 'result'],
+)
+LOGIN_THROTTLED = Counter(
+    'smartcoach_login_throttled_total', 'Login attempts refused by the throttle.', ['bucket'],
+)
+EMAIL_SECONDS = Histogram(
+    'smartcoach_email_send_duration_seconds', 'Time to hand a batch of emails to the mail server.',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+EMAIL_MESSAGES = Counter(
+    'smartcoach_email_messages_total', 'Emails by delivery result.', ['result'],
+)
+IMAGE_SECONDS = Histogram(
+    'smartcoach_image_store_duration_seconds', 'Time to store an uploaded defect image.',
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+def cache_lookup(name, hits, misses=0):
+    if hits:
+        CACHE_REQUESTS.labels(name, 'hit').inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(name, 'miss').inc(misses)
+
+
+# ----------------------------
+# Request and query timing
+# ----------------------------
+class QueryTimer:
+    """``connection.execute_wrapper`` hook counting queries and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        REQUEST_SECONDS.labels(view, request.method, f"{response.status_code // 100}xx").observe(elapsed)
+        REQUEST_QUERIES.labels(view).observe(queries.count)
+        REQUEST_DB_SECONDS.labels(view).observe(queries.seconds)
+        return response
+
+
+# ----------------------------
+# Email delivery
+# ----------------------------
+class MetricsEmailBackend(BaseEmailBackend):
+    """Times and counts every send, delegating to ``EMAIL_DELIVERY_BACKEND``."""
+
+    def __init__(self, fail_silently=False, **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.backend = get_connection(settings.EMAIL_DELIVERY_BACKEND, fail_silently=fail_silently, **kwargs)
+
+    def open(self):
+        return self.backend.open()
+
+    def close(self):
+        return self.backend.close()
+
+    def send_messages(self, email_messages):
+        email_messages = list(email_messages)
+        started = time.perf_counter()
+        try:
+            sent = self.backend.send_messages(email_messages) or 0
+        except Exception:
+            EMAIL_MESSAGES.labels('failed').inc(len(email_messages))
+            raise
+        finally:
+            EMAIL_SECONDS.observe(time.perf_counter() - started)
+        EMAIL_MESSAGES.labels('sent').inc(sent)
+        if sent < len(email_messages):
+            EMAIL_MESSAGES.labels('failed').inc(len(email_messages) - sent)
+        return sent
+
+
+# ----------------------------
+# Scrape
+# ----------------------------
+class DefectCountCollector:
+    """Defects per zone, train and status, read from DefectStatusCount at scrape time."""
+
+    def collect(self):
+        from .models import DefectStatusCount
+
+        gauge = GaugeMetricFamily('smartcoach_defects', 'Defects in the hot table by zone, train and status.',
+                                  labels=['zone', 'train', 'status'])
+        rows = (
+            DefectStatusCount.objects.values_list('coach__train__depot__zone__code', 'coach__train__number', 'status')
+            .annotate(total=Sum('count'))
+            .order_by()
+        )
+        for zone_code, train_number, status, total in rows:
+            gauge.add_metric([zone_code or '', train_number, status], total)
+        yield gauge
+
+
+def render_metrics():
+    """Return ``(body, content_type)`` for the Prometheus scrape."""
+    registry = CollectorRegistry()
+    if MULTIPROCESS:
+        multiprocess.MultiProcessCollector(registry)
+    registry.register(DefectCountCollector())
+    body = generate_latest(registry)
+    if not MULTIPROCESS:
+        body += generate_latest(REGISTRY)
+    return body, CONTENT_TYPE_LATEST
@@ -14,7 +14,7 @@ class Migration(migrations.Migration):
         migrations.AddField(
             model_name='coach',
             name='coach_type',
-            field=models.CharField(choices=[('SL', 'Sleeper'), ('3A', 'AC 3 Tier'), ('2A', 'AC 2 Tier'), ('1A', 'AC 1 Tier'), ('GEN', 'General')], default='Sleeper', max_length=3),
+            field=models.CharField(choices=[('SL', 'Sleeper'), ('3A', 'AC 3 Tier'), ('2A', 'AC 2 Tier'), ('1A', 'AC 1 Tier'), ('GEN', 'General')], default='SL', max_length=3),
             preserve_default=False,
         ),
         migrations.AddField(
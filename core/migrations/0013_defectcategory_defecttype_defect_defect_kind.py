@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_alter_coach_train'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DefectCategory',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=30, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'defect categories',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DefectType',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('ac_only', models.BooleanField(default=False)),
+                ('is_active', models.BooleanField(default=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='types', to='core.defectcategory')),
+            ],
+            options={
+                'ordering': ['category_id', 'id'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='defect',
+            name='defect_type',
+            field=models.CharField(choices=[('Light', 'Light Not Working'), ('Fan', 'Fan Not Working'), ('Window', 'Broken Window'), ('Seat', 'Seat Damaged'), ('Other', 'Other')], max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='defect',
+            name='defect_kind',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.defecttype'),
+        ),
+    ]
@@ -0,0 +1,98 @@
+from django.db import migrations
+
+# Defect types offered on the report form, grouped by category.
+SEED_TYPES = {
+    'Electrical': [
+        'Fan not working',
+        'Light not working',
+        'Charging point not working',
+        'Switches not functioning',
+        'Fan outlet missing',
+        'AC not cooling',
+    ],
+    'Mechanical': [
+        'Seat broken',
+        'Seatbelt damaged',
+        'Door not working',
+        'Window jammed',
+        'Upper berth latch broken',
+    ],
+    'Civil': [
+        'Dirty toilet',
+        'No water in toilet',
+        'Wall paint peeling',
+        'Coach is dirty',
+        'Toilet door not closing',
+    ],
+    'Others': [
+        'Other',
+    ],
+}
+
+# Legacy DEFECT_CHOICES keys and their labels.
+LEGACY_TYPES = {
+    'Light': 'Light not working',
+    'Fan': 'Fan not working',
+    'Window': 'Broken window',
+    'Seat': 'Seat damaged',
+}
+
+# Keywords the old admin dashboard classifier used for free-text types.
+CATEGORY_KEYWORDS = [
+    ('Electrical', ['light', 'fan', 'charging', 'ac ']),
+    ('Mechanical', ['seat', 'door', 'chain', 'handrest']),
+    ('Civil', ['toilet', 'mirror', 'smell', 'leak', 'coach', 'window']),
+]
+
+
+def classify(name):
+    text = f"{name.lower()} "
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return category
+    return 'Others'
+
+
+def populate(apps, schema_editor):
+    DefectCategory = apps.get_model('core', 'DefectCategory')
+    DefectType = apps.get_model('core', 'DefectType')
+    Defect = apps.get_model('core', 'Defect')
+
+    categories = {}
+    for name in SEED_TYPES:
+        categories[name], _ = DefectCategory.objects.get_or_create(name=name)
+
+    types = {}
+    for category, names in SEED_TYPES.items():
+        for name in names:
+            types[name.lower()], _ = DefectType.objects.get_or_create(
+                name=name,
+                defaults={'category': categories[category], 'ac_only': name == 'AC not cooling'},
+            )
+
+    for legacy in Defect.objects.values_list('defect_type', flat=True).distinct():
+        name = LEGACY_TYPES.get(legacy, legacy)
+        if name.lower() not in types:
+            types[name.lower()], _ = DefectType.objects.get_or_create(
+                name=name,
+                defaults={'category': categories[classify(name)]},
+            )
+        Defect.objects.filter(defect_type=legacy).update(defect_kind=types[name.lower()])
+
+
+def unpopulate(apps, schema_editor):
+    Defect = apps.get_model('core', 'Defect')
+    DefectType = apps.get_model('core', 'DefectType')
+    for defect_type in DefectType.objects.all():
+        Defect.objects.filter(defect_kind=defect_type).update(defect_type=defect_type.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_defectcategory_defecttype_defect_defect_kind'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, unpopulate),
+    ]
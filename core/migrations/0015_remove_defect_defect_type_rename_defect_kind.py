@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_populate_defect_types'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='defect',
+            name='defect_type',
+        ),
+        migrations.RenameField(
+            model_name='defect',
+            old_name='defect_kind',
+            new_name='defect_type',
+        ),
+        migrations.AlterField(
+            model_name='defect',
+            name='defect_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='defects', to='core.defecttype'),
+        ),
+    ]
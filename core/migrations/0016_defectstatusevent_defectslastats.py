@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_remove_defect_defect_type_rename_defect_kind'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DefectSLAStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('coach_type', models.CharField(max_length=10)),
+                ('metric', models.CharField(choices=[('acknowledge', 'Time to acknowledge'), ('resolve', 'Time to resolve')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_seconds', models.FloatField(default=0)),
+                ('sketch', models.JSONField(default=dict)),
+                ('train', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sla_stats', to='core.train')),
+            ],
+            options={
+                'verbose_name_plural': 'defect SLA stats',
+                'constraints': [models.UniqueConstraint(fields=('train', 'coach_type', 'metric'), name='unique_sla_group')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DefectStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(max_length=100)),
+                ('to_status', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('defect', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='core.defect')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['defect', 'created_at'], name='core_defect_defect__a467f9_idx')],
+            },
+        ),
+    ]
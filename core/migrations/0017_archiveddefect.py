@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_defectstatusevent_defectslastats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedDefect',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('defect_id', models.BigIntegerField(unique=True)),
+                ('train_number', models.CharField(max_length=10)),
+                ('train_name', models.CharField(max_length=100)),
+                ('coach_number', models.CharField(max_length=10)),
+                ('coach_type', models.CharField(max_length=10)),
+                ('defect_type', models.CharField(max_length=100)),
+                ('category', models.CharField(max_length=30)),
+                ('custom_defect_text', models.TextField(blank=True, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('image', models.CharField(blank=True, max_length=200)),
+                ('reported_by_username', models.CharField(max_length=150)),
+                ('date_reported', models.DateTimeField()),
+                ('resolved_at', models.DateTimeField(null=True)),
+                ('status_history', models.JSONField(default=list)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('reported_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date_reported'], name='core_archiv_date_re_5860da_idx'), models.Index(fields=['train_number', 'date_reported'], name='core_archiv_train_n_c8d995_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+from core.partitions import add_months, ensure_partitions, month_start
+
+MONTHS_AHEAD = 3
+
+
+def partition_defects(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("ALTER TABLE core_defect RENAME TO core_defect_unpartitioned")
+        cursor.execute(
+            "CREATE TABLE core_defect (LIKE core_defect_unpartitioned INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (date_reported)"
+        )
+        cursor.execute("CREATE SEQUENCE core_defect_partitioned_id_seq OWNED BY core_defect.id")
+        cursor.execute("ALTER TABLE core_defect ALTER COLUMN id SET DEFAULT nextval('core_defect_partitioned_id_seq')")
+        # The partition key has to be part of every unique constraint.
+        cursor.execute("ALTER TABLE core_defect ADD PRIMARY KEY (id, date_reported)")
+        for column, target in [
+            ('coach_id', 'core_coach'),
+            ('defect_type_id', 'core_defecttype'),
+            ('reported_by_id', 'auth_user'),
+        ]:
+            cursor.execute(
+                f"ALTER TABLE core_defect ADD FOREIGN KEY ({column}) REFERENCES {target} (id) "
+                f"DEFERRABLE INITIALLY DEFERRED"
+            )
+            cursor.execute(f"CREATE INDEX ON core_defect ({column})")
+        cursor.execute("CREATE INDEX ON core_defect (date_reported)")
+        cursor.execute("CREATE TABLE core_defect_default PARTITION OF core_defect DEFAULT")
+
+        cursor.execute("SELECT MIN(date_reported) FROM core_defect_unpartitioned")
+        oldest = cursor.fetchone()[0] or timezone.now()
+        ensure_partitions(oldest, add_months(month_start(timezone.now()), MONTHS_AHEAD + 1), connection)
+
+        cursor.execute("INSERT INTO core_defect SELECT * FROM core_defect_unpartitioned")
+        cursor.execute(
+            "SELECT setval('core_defect_partitioned_id_seq', "
+            "COALESCE((SELECT MAX(id) FROM core_defect), 0) + 1, false)"
+        )
+        cursor.execute("DROP TABLE core_defect_unpartitioned")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_archiveddefect'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='defectstatusevent',
+            name='defect',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='core.defect'),
+        ),
+        # Leaving the partitioned table in place on rollback is harmless.
+        migrations.RunPython(partition_defects, migrations.RunPython.noop),
+    ]
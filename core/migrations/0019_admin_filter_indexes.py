@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_partition_defect_by_month'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archiveddefect',
+            index=models.Index(fields=['category', 'date_reported'], name='core_archiv_categor_28456f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='defect',
+            index=models.Index(fields=['status', 'date_reported'], name='core_defect_status_71cc71_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='defectstatusevent',
+            index=models.Index(fields=['to_status', 'created_at'], name='core_defect_to_stat_1816b8_idx'),
+        ),
+    ]
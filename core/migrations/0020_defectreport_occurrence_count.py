@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_reports(apps, schema_editor):
+    # Every existing defect was reported exactly once, by its reported_by user.
+    schema_editor.execute(
+        "INSERT INTO core_defectreport (defect_id, reported_by_id, reported_at) "
+        "SELECT id, reported_by_id, date_reported FROM core_defect"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_admin_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DefectReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reported_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='archiveddefect',
+            name='occurrence_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='defect',
+            name='occurrence_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddIndex(
+            model_name='defect',
+            index=models.Index(condition=models.Q(('status__in', ['Pending', 'In Progress'])), fields=['coach', 'defect_type', 'date_reported'], name='defect_open_coach_type_idx'),
+        ),
+        migrations.AddField(
+            model_name='defectreport',
+            name='defect',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='reports', to='core.defect'),
+        ),
+        migrations.AddField(
+            model_name='defectreport',
+            name='reported_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='defect_reports', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='defectreport',
+            index=models.Index(fields=['reported_by', 'reported_at'], name='core_defect_reporte_143410_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='defectreport',
+            constraint=models.UniqueConstraint(fields=('defect', 'reported_by'), name='unique_defect_reporter'),
+        ),
+        migrations.RunPython(backfill_reports, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_defectreport_occurrence_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='defect',
+            name='claim_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='defect',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_defects', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='defect',
+            index=models.Index(models.OrderBy(models.F('occurrence_count'), descending=True), models.F('date_reported'), condition=models.Q(('status__in', ['Pending', 'In Progress'])), name='defect_open_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_defect_claims'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DefectHotspot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('coach', 'Coach'), ('train', 'Train')], max_length=5)),
+                ('window_days', models.PositiveSmallIntegerField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('defect_count', models.PositiveIntegerField()),
+                ('repeat_count', models.PositiveIntegerField()),
+                ('recurrence_score', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+                ('coach', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.coach')),
+                ('top_defect_type', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.defecttype')),
+                ('train', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.train')),
+            ],
+            options={
+                'ordering': ['scope', 'window_days', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('scope', 'window_days', 'rank'), name='unique_hotspot_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_defecthotspot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DefectRateBaseline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('bucket_count', models.PositiveIntegerField(default=0)),
+                ('mean', models.FloatField(default=0)),
+                ('variance', models.FloatField(default=0)),
+                ('buckets_seen', models.PositiveIntegerField(default=0)),
+                ('alerted_bucket', models.DateTimeField(null=True)),
+                ('defect_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.defecttype')),
+                ('train', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.train')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('train', 'defect_type'), name='unique_rate_baseline')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DefectSpike',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.PositiveIntegerField()),
+                ('expected', models.FloatField()),
+                ('z_score', models.FloatField()),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+                ('defect_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.defecttype')),
+                ('train', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='defect_spikes', to='core.train')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['detected_at'], name='core_defect_detecte_4bfd38_idx')],
+            },
+        ),
+    ]
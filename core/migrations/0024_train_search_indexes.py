@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:05
+
+from django.db import migrations
+
+# Trigram GIN indexes serve both the prefix match on number and the substring
+# match on name in the train typeahead (Django's i-lookups compare UPPER()).
+# Servers without the pg_trgm contrib module get btree prefix indexes instead.
+INDEXES = {
+    'core_train_number_search': 'number',
+    'core_train_name_search': 'name',
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        trigram = cursor.fetchone() is not None
+        if trigram:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, column in INDEXES.items():
+            if trigram:
+                method = f"gin (UPPER({column}::text) gin_trgm_ops)"
+            else:
+                method = f"btree (UPPER({column}::text) text_pattern_ops)"
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON core_train USING {method}")
+
+
+def drop_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        for name in INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_defect_spike_detection'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_defects(apps, schema_editor):
+    Defect = apps.get_model('core', 'Defect')
+    DefectStatusCount = apps.get_model('core', 'DefectStatusCount')
+    rows = Defect.objects.values_list('coach_id', 'status').annotate(n=Count('id')).order_by()
+    DefectStatusCount.objects.bulk_create(
+        [DefectStatusCount(coach_id=coach_id, status=status, count=n) for coach_id, status, n in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_train_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DefectStatusCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+                ('coach', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.coach')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('coach', 'status'), name='unique_coach_status_count')],
+            },
+        ),
+        migrations.RunPython(count_existing_defects, migrations.RunPython.noop),
+    ]
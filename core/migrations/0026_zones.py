@@ -0,0 +1,90 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_defectstatuscount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Depot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=10, unique=True)),
+                ('name', models.CharField(max_length=100)),
+            ],
+            options={
+                'ordering': ['zone__code', 'code'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StaffProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Zone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=10, unique=True)),
+                ('name', models.CharField(max_length=100)),
+            ],
+            options={
+                'ordering': ['code'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='defect',
+            name='core_defect_status_71cc71_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='defect',
+            name='defect_open_queue_idx',
+        ),
+        migrations.AddField(
+            model_name='train',
+            name='depot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='trains', to='core.depot'),
+        ),
+        migrations.AddField(
+            model_name='staffprofile',
+            name='depot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='staff', to='core.depot'),
+        ),
+        migrations.AddField(
+            model_name='staffprofile',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='staff_profile', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='staffprofile',
+            name='zone',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='staff', to='core.zone'),
+        ),
+        migrations.AddField(
+            model_name='depot',
+            name='zone',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='depots', to='core.zone'),
+        ),
+        migrations.AddField(
+            model_name='defect',
+            name='zone',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.zone'),
+        ),
+        migrations.AddIndex(
+            model_name='defect',
+            index=models.Index(fields=['zone', 'status', 'date_reported'], name='defect_zone_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='defect',
+            index=models.Index(models.F('zone'), models.OrderBy(models.F('occurrence_count'), descending=True), models.F('date_reported'), condition=models.Q(('status__in', ['Pending', 'In Progress'])), name='defect_zone_open_queue_idx'),
+        ),
+    ]
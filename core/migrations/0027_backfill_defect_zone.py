@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-19 09:12
+
+from django.db import migrations
+
+
+def backfill_defect_zone(apps, schema_editor):
+    # Defect.zone is copied from coach.train.depot.zone when a report is filed;
+    # rows filed before 0026, or whose train got a depot outside the admin,
+    # are stamped here. One UPDATE per depot keeps each one index-driven.
+    Defect = apps.get_model('core', 'Defect')
+    Depot = apps.get_model('core', 'Depot')
+    for depot_id, zone_id in Depot.objects.values_list('id', 'zone_id'):
+        Defect.objects.filter(coach__train__depot_id=depot_id).exclude(zone_id=zone_id).update(zone_id=zone_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_zones'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_defect_zone, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_backfill_defect_zone'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='defecthotspot',
+            options={'ordering': ['area', 'scope', 'window_days', 'rank']},
+        ),
+        migrations.RemoveConstraint(
+            model_name='defecthotspot',
+            name='unique_hotspot_rank',
+        ),
+        migrations.AddField(
+            model_name='defecthotspot',
+            name='area',
+            field=models.CharField(default='fleet', max_length=32),
+        ),
+        migrations.AddConstraint(
+            model_name='defecthotspot',
+            constraint=models.UniqueConstraint(fields=('area', 'scope', 'window_days', 'rank'), name='unique_hotspot_rank'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_defecthotspot_area'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archiveddefect',
+            name='reporters',
+            field=models.JSONField(default=list),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_archiveddefect_reporters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='defect',
+            index=models.Index(fields=['status', 'date_reported'], name='core_defect_status_71cc71_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='defect',
+            index=models.Index(models.OrderBy(models.F('occurrence_count'), descending=True), models.F('date_reported'), condition=models.Q(('status__in', ['Pending', 'In Progress'])), name='defect_open_queue_idx'),
+        ),
+    ]
@@ -1,8 +1,37 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+class Zone(models.Model):
+    """A railway zone; staff, trains and defects are scoped by it."""
+    code = models.CharField(max_length=10, unique=True)
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        ordering = ['code']
+
+    def __str__(self):
+        return self.code
+
+
+class Depot(models.Model):
+    """A maintenance depot within a zone; it owns the rakes of its trains."""
+    zone = models.ForeignKey(Zone, on_delete=models.PROTECT, related_name='depots')
+    code = models.CharField(max_length=10, unique=True)
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        ordering = ['zone__code', 'code']
+
+    def __str__(self):
+        return f"{self.code} ({self.zone.code})"
+
+
 class Train(models.Model):
     number = models.CharField(max_length=10, unique=True)
     name = models.CharField(max_length=100)
+    depot = models.ForeignKey(Depot, on_delete=models.PROTECT, null=True, blank=True, related_name='trains')
 
     def __str__(self):
         return f"{self.number} - {self.name}"
@@ -23,16 +52,45 @@ class Coach(models.Model):
     def __str__(self):
         return f"{self.coach_number} ({self.get_coach_type_display()}) - {self.train}"
 
+class DefectCategory(models.Model):
+    id = models.SmallAutoField(primary_key=True)
+    name = models.CharField(max_length=30, unique=True)
+
+    class Meta:
+        verbose_name_plural = 'defect categories'
+        ordering = ['id']
+
+    def __str__(self):
+        return self.name
+
+
+class DefectType(models.Model):
+    OTHER = 'Other'
+
+    id = models.SmallAutoField(primary_key=True)
+    name = models.CharField(max_length=100, unique=True)
+    category = models.ForeignKey(DefectCategory, on_delete=models.PROTECT, related_name='types')
+    ac_only = models.BooleanField(default=False)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['category_id', 'id']
+
+    def __str__(self):
+        return self.name
+
+
 class Defect(models.Model):
-    DEFECT_CHOICES = [
-        ('Light', 'Light Not Working'),
-        ('Fan', 'Fan Not Working'),
-        ('Window', 'Broken Window'),
-        ('Seat', 'Seat Damaged'),
-        ('Other', 'Other'),
-    ]
+    STATUSES = ['Pending', 'In Progress', 'Resolved']
+    OPEN_STATUSES = ['Pending', 'In Progress']
+    TRANSITIONS = {
+        'Pending': ['In Progress'],
+        'In Progress': ['Resolved'],
+        'Resolved': [],
+    }
+
     coach = models.ForeignKey(Coach, on_delete=models.CASCADE)
-    defect_type = models.CharField(max_length=100, choices=DEFECT_CHOICES)
+    defect_type = models.ForeignKey(DefectType, on_delete=models.PROTECT, related_name='defects')
     custom_defect_text = models.TextField(blank=True, null=True)
     title = models.CharField(max_length=200, blank=True, null=True)
     description = models.TextField(blank=True, null=True)
@@ -40,10 +98,265 @@ class Defect(models.Model):
     reported_by = models.ForeignKey(User, on_delete=models.CASCADE)
     date_reported = models.DateTimeField(auto_now_add=True)
     status = models.CharField(default='Pending', max_length=100)
+    occurrence_count = models.PositiveIntegerField(default=1)
+    # Work-order lease: a claim is void once claim_expires_at has passed.
+    claimed_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='claimed_defects'
+    )
+    claim_expires_at = models.DateTimeField(null=True, blank=True)
+    # Copied from coach.train.depot.zone when filed (core.zones.sync_train_zone
+    # rewrites it when a train changes depot) so scoped queries need no joins.
+    zone = models.ForeignKey(Zone, on_delete=models.PROTECT, null=True, blank=True, db_index=False, related_name='+')
+
+    class Meta:
+        # Staff work inside one zone, so the hot indexes lead with it. Fleet-wide
+        # users (no StaffProfile) filter without a zone and keep the
+        # status-led and open-queue indexes.
+        indexes = [
+            models.Index(fields=['status', 'date_reported']),
+            models.Index(fields=['zone', 'status', 'date_reported'], name='defect_zone_status_idx'),
+            # Duplicate-report lookup: the open defect for a (coach, defect type).
+            models.Index(
+                fields=['coach', 'defect_type', 'date_reported'],
+                condition=models.Q(status__in=['Pending', 'In Progress']),
+                name='defect_open_coach_type_idx',
+            ),
+            # Work queue order: most-reported first, then oldest.
+            models.Index(
+                models.F('occurrence_count').desc(),
+                'date_reported',
+                condition=models.Q(status__in=['Pending', 'In Progress']),
+                name='defect_open_queue_idx',
+            ),
+            models.Index(
+                'zone',
+                models.F('occurrence_count').desc(),
+                'date_reported',
+                condition=models.Q(status__in=['Pending', 'In Progress']),
+                name='defect_zone_open_queue_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.coach.coach_number} - {self.defect_type} ({self.reported_by.username})"
-    
+
+    def can_transition_to(self, new_status):
+        return new_status in self.TRANSITIONS.get(self.status, [])
+
+    @property
+    def next_statuses(self):
+        return self.TRANSITIONS.get(self.status, [])
+
+    def is_claimed_by_other(self, user, now=None):
+        now = now or timezone.now()
+        return bool(
+            self.claimed_by_id
+            and self.claimed_by_id != user.id
+            and self.claim_expires_at
+            and self.claim_expires_at > now
+        )
+
+
+class DefectReport(models.Model):
+    """One passenger's report of a defect; duplicates attach to the open defect."""
+    defect = models.ForeignKey(Defect, on_delete=models.CASCADE, related_name='reports', db_constraint=False)
+    reported_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='defect_reports')
+    reported_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['defect', 'reported_by'], name='unique_defect_reporter'),
+        ]
+        indexes = [models.Index(fields=['reported_by', 'reported_at'])]
+
+    def __str__(self):
+        return f"#{self.defect_id} reported by {self.reported_by.username}"
+
+
+class DefectStatusEvent(models.Model):
+    # core_defect is partitioned on PostgreSQL, so foreign keys into it cannot
+    # be enforced by the database; Django still cascades deletes.
+    defect = models.ForeignKey(Defect, on_delete=models.CASCADE, related_name='status_events', db_constraint=False)
+    from_status = models.CharField(max_length=100)
+    to_status = models.CharField(max_length=100)
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['defect', 'created_at']),
+            models.Index(fields=['to_status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"#{self.defect_id}: {self.from_status} → {self.to_status}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Status events are append-only.")
+        super().save(*args, **kwargs)
+
+
+class DefectStatusCount(models.Model):
+    """Running count of hot-table defects per coach and status, kept in step by core.workflow."""
+    coach = models.ForeignKey(Coach, on_delete=models.CASCADE, related_name='+')
+    status = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['coach', 'status'], name='unique_coach_status_count'),
+        ]
+
+    def __str__(self):
+        return f"{self.coach.coach_number} {self.status}: {self.count}"
+
+
+class DefectSLAStats(models.Model):
+    ACKNOWLEDGE = 'acknowledge'
+    RESOLVE = 'resolve'
+    METRIC_CHOICES = [
+        (ACKNOWLEDGE, 'Time to acknowledge'),
+        (RESOLVE, 'Time to resolve'),
+    ]
+    train = models.ForeignKey(Train, on_delete=models.CASCADE, related_name='sla_stats')
+    coach_type = models.CharField(max_length=10)
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+    total_seconds = models.FloatField(default=0)
+    sketch = models.JSONField(default=dict)
+
+    class Meta:
+        verbose_name_plural = 'defect SLA stats'
+        constraints = [
+            models.UniqueConstraint(fields=['train', 'coach_type', 'metric'], name='unique_sla_group'),
+        ]
+
+    def __str__(self):
+        return f"{self.train.number} {self.coach_type} {self.metric}"
+
+
+class DefectRateBaseline(models.Model):
+    """Rolling EWMA of defects per time bucket for one train and defect type."""
+    train = models.ForeignKey(Train, on_delete=models.CASCADE, related_name='+')
+    defect_type = models.ForeignKey(DefectType, on_delete=models.CASCADE, related_name='+')
+    bucket_start = models.DateTimeField()
+    bucket_count = models.PositiveIntegerField(default=0)
+    mean = models.FloatField(default=0)
+    variance = models.FloatField(default=0)
+    buckets_seen = models.PositiveIntegerField(default=0)
+    alerted_bucket = models.DateTimeField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['train', 'defect_type'], name='unique_rate_baseline'),
+        ]
+
+    def __str__(self):
+        return f"{self.train.number} {self.defect_type} baseline"
+
+
+class DefectSpike(models.Model):
+    """A bucket whose defect count was well above its train/type baseline."""
+    train = models.ForeignKey(Train, on_delete=models.CASCADE, related_name='defect_spikes')
+    defect_type = models.ForeignKey(DefectType, on_delete=models.CASCADE, related_name='+')
+    bucket_start = models.DateTimeField()
+    count = models.PositiveIntegerField()
+    expected = models.FloatField()
+    z_score = models.FloatField()
+    detected_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['detected_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.train.number} {self.defect_type}: {self.count} vs {self.expected:.1f} expected"
+
+
+class ArchivedDefect(models.Model):
+    """Read-only snapshot of a resolved defect moved out of the hot table."""
+    defect_id = models.BigIntegerField(unique=True)
+    train_number = models.CharField(max_length=10)
+    train_name = models.CharField(max_length=100)
+    coach_number = models.CharField(max_length=10)
+    coach_type = models.CharField(max_length=10)
+    defect_type = models.CharField(max_length=100)
+    category = models.CharField(max_length=30)
+    custom_defect_text = models.TextField(blank=True, null=True)
+    description = models.TextField(blank=True, null=True)
+    image = models.CharField(max_length=200, blank=True)
+    reported_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    reported_by_username = models.CharField(max_length=150)
+    occurrence_count = models.PositiveIntegerField(default=1)
+    # Every DefectReport merged into the defect, first reporter first.
+    reporters = models.JSONField(default=list)
+    date_reported = models.DateTimeField()
+    resolved_at = models.DateTimeField(null=True)
+    status_history = models.JSONField(default=list)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_reported']),
+            models.Index(fields=['train_number', 'date_reported']),
+            models.Index(fields=['category', 'date_reported']),
+        ]
+
+    def __str__(self):
+        return f"{self.coach_number} - {self.defect_type} ({self.reported_by_username}, archived)"
+
+
+class DefectHotspot(models.Model):
+    """Precomputed chronic-offender ranking, rebuilt by ``compute_hotspots``."""
+    COACH = 'coach'
+    TRAIN = 'train'
+    SCOPES = [(COACH, 'Coach'), (TRAIN, 'Train')]
+
+    scope = models.CharField(max_length=5, choices=SCOPES)
+    # core.zones.scope_key() of what was ranked: the fleet, one zone or one depot.
+    area = models.CharField(max_length=32, default='fleet')
+    window_days = models.PositiveSmallIntegerField()
+    rank = models.PositiveSmallIntegerField()
+    train = models.ForeignKey(Train, on_delete=models.CASCADE, related_name='+')
+    coach = models.ForeignKey(Coach, on_delete=models.CASCADE, null=True, related_name='+')
+    top_defect_type = models.ForeignKey(DefectType, on_delete=models.SET_NULL, null=True, related_name='+')
+    defect_count = models.PositiveIntegerField()
+    # Defects of a type already reported on the same coach/train in the window.
+    repeat_count = models.PositiveIntegerField()
+    recurrence_score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['area', 'scope', 'window_days', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['area', 'scope', 'window_days', 'rank'], name='unique_hotspot_rank'),
+        ]
+
+    def __str__(self):
+        return f"#{self.rank} {self.coach or self.train} ({self.window_days}d)"
+
+
+class StaffProfile(models.Model):
+    """Where a staff member or admin works: a whole zone, or one depot in it.
+
+    Users without a profile see the whole fleet.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='staff_profile')
+    zone = models.ForeignKey(Zone, on_delete=models.PROTECT, related_name='staff')
+    depot = models.ForeignKey(Depot, on_delete=models.PROTECT, null=True, blank=True, related_name='staff')
+
+    def __str__(self):
+        return f"{self.user.username} @ {self.depot or self.zone}"
+
+    def save(self, *args, **kwargs):
+        if self.depot_id:
+            self.zone_id = self.depot.zone_id
+        super().save(*args, **kwargs)
+
+
 class PassengerProfile(models.Model):
     GENDER_CHOICES = [
         ('male', 'Male'),
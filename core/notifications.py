@@ -0,0 +1,118 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import send_mail, send_mass_mail
+from django.db.models import Q
+from django.utils import timezone
+
+
+# ----------------------------
+# Welcome emails
+# ----------------------------
+def welcome_message(user, raw_password):
+    """Return a ``(subject, message, from_email, recipient_list)`` tuple."""
+    subject = 'Welcome to SmartCoach! 🚆'
+    message = f'''
+Dear {user.first_name},
+
+Thank you for registering on SmartCoach Railway Defect Reporting.
+
+👤 Username: {user.username}
+🔑 Password: {raw_password}
+
+You can now login and start reporting issues.
+
+Regards,
+SmartCoach Team 🚆
+'''
+    return subject, message, settings.EMAIL_HOST_USER, [user.email]
+
+
+# ----------------------------
+# Batched status-update emails
+# ----------------------------
+def status_update_messages(defects, previous_statuses, new_status):
+    """Build one combined email per reporter for a batch of status changes.
+
+    Everyone whose report was merged into a defect is notified, so callers
+    should prefetch ``reports__reported_by``.
+    """
+    by_reporter = defaultdict(list)
+    for defect in defects:
+        reporters = {defect.reported_by}
+        reporters.update(report.reported_by for report in defect.reports.all())
+        for reporter in reporters:
+            by_reporter[reporter].append(defect)
+
+    messages = []
+    for reporter, reporter_defects in by_reporter.items():
+        if not reporter.email:
+            continue
+        lines = ''.join(f"""
+🆔 Defect ID: {defect.id}
+🚆 Train: {defect.coach.train.name} ({defect.coach.train.number})
+🚃 Coach: {defect.coach.coach_number}
+🔧 Defect Type: {defect.defect_type}
+🟡 Previous Status: {previous_statuses.get(defect.id, '-')}
+🟢 Updated Status: {new_status}
+--------------------------""" for defect in reporter_defects)
+
+        subject = "SmartCoach | Defect Status Updated 🔄"
+        if len(reporter_defects) > 1:
+            subject = f"SmartCoach | {len(reporter_defects)} Defects Updated 🔄"
+        message = f"""
+Dear {reporter.first_name or reporter.username},
+
+Your defect report(s) have been updated.
+{lines}
+
+Regards,
+SmartCoach Team
+"""
+        messages.append((subject, message, settings.EMAIL_HOST_USER, [reporter.email]))
+    return messages
+
+
+def send_status_update_batch(defects, previous_statuses, new_status):
+    """Send the combined emails for a batch over a single SMTP connection."""
+    messages = status_update_messages(defects, previous_statuses, new_status)
+    if messages:
+        send_mass_mail(messages, fail_silently=True)
+    return len(messages)
+
+
+# ----------------------------
+# Spike alerts
+# ----------------------------
+def spike_alert_message(spike, recipients):
+    """Return a ``(subject, message, from_email, recipient_list)`` tuple."""
+    subject = f"SmartCoach | Spike in {spike.defect_type} defects on {spike.train.number} 🚨"
+    message = f"""
+Unusual number of defect reports detected.
+
+🚆 Train: {spike.train.name} ({spike.train.number})
+🔧 Defect Type: {spike.defect_type}
+🕒 Since: {timezone.localtime(spike.bucket_start):%Y-%m-%d %H:%M}
+📈 Reported: {spike.count} (usually about {spike.expected:.1f})
+
+Regards,
+SmartCoach Team
+"""
+    return subject, message, settings.EMAIL_HOST_USER, recipients
+
+
+def send_spike_alert(spike):
+    """Email active superusers responsible for the spike's train (fleet-wide or its zone/depot)."""
+    in_scope = Q(staff_profile__isnull=True)
+    depot = spike.train.depot
+    if depot:
+        in_scope |= Q(staff_profile__zone_id=depot.zone_id, staff_profile__depot__isnull=True)
+        in_scope |= Q(staff_profile__depot=depot)
+    recipients = list(
+        User.objects.filter(in_scope, is_superuser=True, is_active=True).exclude(email='')
+        .values_list('email', flat=True)
+    )
+    if recipients:
+        send_mail(*spike_alert_message(spike, recipients), fail_silently=True)
+    return len(recipients)
@@ -0,0 +1,88 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .metrics import cache_lookup
+
+
+# ----------------------------
+# Paginator for large PostgreSQL tables
+# ----------------------------
+class EstimatedCountPaginator(Paginator):
+    """Avoid ``COUNT(*)`` on every page view of a large listing.
+
+    On PostgreSQL the row count comes from ``pg_class.reltuples`` for an
+    unfiltered table and from the planner's estimate (``EXPLAIN``) for a
+    filtered one. Below ``PAGINATOR_EXACT_COUNT_THRESHOLD`` rows an exact
+    count is cheap, so one is run instead. Either way the result is cached
+    per query signature for ``PAGINATOR_COUNT_CACHE_SECONDS``. Other backends
+    count exactly (still cached).
+
+    Pass ``cache_count=False`` for querysets filtered on the current time:
+    their SQL differs on every request, so a cached count would never be read.
+    """
+
+    def __init__(self, object_list, per_page, *args, cache_count=True, **kwargs):
+        super().__init__(object_list, per_page, *args, **kwargs)
+        self.cache_count = cache_count
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        if not self.cache_count:
+            return queryset.count()
+
+        key = self.cache_key(queryset)
+        count = cache.get(key)
+        cache_lookup('paginator_count', count is not None, count is None)
+        if count is None:
+            estimate = self.estimated_count(queryset)
+            if estimate is None or estimate < settings.PAGINATOR_EXACT_COUNT_THRESHOLD:
+                count = queryset.count()
+            else:
+                count = estimate
+            cache.set(key, count, settings.PAGINATOR_COUNT_CACHE_SECONDS)
+        return count
+
+    @staticmethod
+    def cache_key(queryset):
+        sql, params = queryset.order_by().query.sql_with_params()
+        signature = hashlib.md5(repr((queryset.db, sql, params)).encode()).hexdigest()
+        return f"paginator:count:{signature}"
+
+    def estimated_count(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        query = queryset.order_by().query
+        with connection.cursor() as cursor:
+            if not query.where and not query.distinct:
+                return self.table_estimate(cursor, queryset.model._meta.db_table)
+
+            sql, params = query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @staticmethod
+    def table_estimate(cursor, table):
+        # A partitioned parent is summed over its partitions.
+        cursor.execute(
+            "SELECT CASE WHEN c.relkind = 'p' THEN ("
+            "  SELECT COALESCE(SUM(GREATEST(p.reltuples, 0)), 0) FROM pg_inherits i "
+            "  JOIN pg_class p ON p.oid = i.inhrelid WHERE i.inhparent = c.oid"
+            ") ELSE GREATEST(c.reltuples, 0) END "
+            "FROM pg_class c WHERE c.oid = %s::regclass",
+            [table],
+        )
+        return int(cursor.fetchone()[0])
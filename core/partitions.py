@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection as default_connection, transaction
+from django.utils import timezone
+
+# core_defect is range-partitioned by month of date_reported on PostgreSQL.
+# Other backends keep a plain table and every helper here is a no-op.
+TABLE = 'core_defect'
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def recent_range(days, now=None):
+    """``(since, until)`` covering the last ``days`` days.
+
+    The upper bound (end of the current month) lets the planner prune the
+    future partitions as well as the old ones. The lower bound is rounded
+    down to the hour so the query, and with it the paginator's cached
+    count, stays the same from one request to the next.
+    """
+    now = now or timezone.now()
+    since = now.replace(minute=0, second=0, microsecond=0) - timedelta(days=days)
+    return since, add_months(month_start(now), 1)
+
+
+def is_partitioned(connection=default_connection):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = %s",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def ensure_partitions(start, end, connection=default_connection):
+    """Create the monthly partitions covering [start, end) that do not exist yet.
+
+    Returns ``{partition: rows moved out of the DEFAULT partition}``.
+    """
+    created = {}
+    if not is_partitioned(connection):
+        return created
+
+    month = month_start(start)
+    while month < end:
+        name = partition_name(month)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            exists = cursor.fetchone()[0] is not None
+        if not exists:
+            created[name] = create_partition(month, connection)
+        month = add_months(month, 1)
+    return created
+
+
+def create_partition(month, connection=default_connection):
+    """Create ``month``'s partition, moving any of its rows out of DEFAULT first.
+
+    PostgreSQL refuses to create a partition while DEFAULT holds rows in its
+    range, so DEFAULT is detached, its rows for the month are moved into the
+    new partition and it is attached again, all in one transaction. Detaching
+    locks core_defect for the duration. Returns the number of rows moved.
+    """
+    name = connection.ops.quote_name(partition_name(month))
+    bounds = [month, add_months(month, 1)]
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE date_reported >= %s AND date_reported < %s)",
+            bounds,
+        )
+        if not cursor.fetchone()[0]:
+            cursor.execute(f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)", bounds)
+            return 0
+
+        cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}")
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)", bounds)
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date_reported >= %s AND date_reported < %s "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved",
+            bounds,
+        )
+        moved = cursor.rowcount
+        cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+    return moved
+
+
+def list_partitions(connection=default_connection):
+    if not is_partitioned(connection):
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s ORDER BY c.relname",
+            [TABLE],
+        )
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,148 @@
+import cProfile
+import io
+import json
+import pstats
+import random
+import re
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+NAME_RE = re.compile(r'^[\w-]+$')
+
+
+# ----------------------------
+# Per-request profiling
+# ----------------------------
+class SQLTimeline:
+    """``connection.execute_wrapper`` hook recording each query's offset and duration."""
+
+    def __init__(self, started):
+        self.started = started
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        begin = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            end = time.perf_counter()
+            self.queries.append({
+                'at_ms': round((begin - self.started) * 1000, 2),
+                'ms': round((end - begin) * 1000, 2),
+                'sql': sql[:2000],
+            })
+
+
+class ProfilingMiddleware:
+    """Profile a request when asked for (``?_profile=1`` or ``X-Profile: 1``
+    from a staff user) or when picked by ``PROFILE_SAMPLE_RATE``.
+
+    Every other request only pays for the checks below.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        timeline = SQLTimeline(started)
+        profiler = cProfile.Profile()
+        with connection.execute_wrapper(timeline):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed = time.perf_counter() - started
+
+        name = save_profile(request, response, profiler, timeline.queries, elapsed)
+        response['X-Profile-Id'] = name
+        return response
+
+    @staticmethod
+    def should_profile(request):
+        if request.GET.get('_profile') == '1' or request.headers.get('X-Profile') == '1':
+            return request.user.is_authenticated and request.user.is_staff
+        rate = settings.PROFILE_SAMPLE_RATE
+        return bool(rate) and random.random() < rate
+
+
+# ----------------------------
+# Storage with retention
+# ----------------------------
+def profile_dir():
+    path = Path(settings.PROFILE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def save_profile(request, response, profiler, queries, elapsed):
+    """Write ``<name>.prof`` (pstats) and ``<name>.json`` (metadata, SQL) and prune old dumps."""
+    now = timezone.now()
+    match = request.resolver_match
+    view = (match.url_name or match.view_name) if match else 'unmatched'
+    name = f"{now:%Y%m%d-%H%M%S}-{view}-{uuid.uuid4().hex[:8]}"
+    path = profile_dir()
+
+    profiler.dump_stats(path / f"{name}.prof")
+    meta = {
+        'name': name,
+        'created_at': now.isoformat(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'view': view,
+        'status': response.status_code,
+        'user': request.user.get_username() if request.user.is_authenticated else '',
+        'duration_ms': round(elapsed * 1000, 2),
+        'sql_ms': round(sum(query['ms'] for query in queries), 2),
+        'queries': queries,
+    }
+    (path / f"{name}.json").write_text(json.dumps(meta))
+    prune_profiles(path)
+    return name
+
+
+def prune_profiles(path):
+    cutoff = time.time() - settings.PROFILE_MAX_AGE_DAYS * 86400
+    dumps = sorted(path.glob('*.json'), key=lambda item: item.stat().st_mtime, reverse=True)
+    for index, meta in enumerate(dumps):
+        if index >= settings.PROFILE_MAX_FILES or meta.stat().st_mtime < cutoff:
+            meta.unlink(missing_ok=True)
+            meta.with_suffix('.prof').unlink(missing_ok=True)
+
+
+def list_profiles():
+    """Metadata of stored profiles, newest first (without the SQL list)."""
+    profiles = []
+    for meta in sorted(profile_dir().glob('*.json'), reverse=True):
+        data = json.loads(meta.read_text())
+        data['query_count'] = len(data.pop('queries'))
+        profiles.append(data)
+    return profiles
+
+
+def profile_path(name, suffix):
+    if not NAME_RE.match(name):
+        return None
+    path = profile_dir() / f"{name}{suffix}"
+    return path if path.exists() else None
+
+
+def load_profile(name, sort='cumulative', limit=40):
+    """Metadata plus a pstats text report for one stored profile, or ``None``."""
+    meta_path, stats_path = profile_path(name, '.json'), profile_path(name, '.prof')
+    if not meta_path or not stats_path:
+        return None
+    data = json.loads(meta_path.read_text())
+    output = io.StringIO()
+    pstats.Stats(str(stats_path), stream=output).strip_dirs().sort_stats(sort).print_stats(limit)
+    data['report'] = output.getvalue()
+    return data
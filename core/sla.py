@@ -0,0 +1,51 @@
+import math
+
+# Log-bucketed quantile sketch: every bucket spans a factor of GAMMA, so any
+# percentile read back from it is within ~5% of the true duration.
+GAMMA = 1.1
+_LOG_GAMMA = math.log(GAMMA)
+
+
+def bucket_key(seconds):
+    return str(math.ceil(math.log(max(seconds, 1.0)) / _LOG_GAMMA))
+
+
+def bucket_value(key):
+    return 2 * GAMMA ** int(key) / (GAMMA + 1)
+
+
+def add_to_sketch(sketch, durations):
+    for seconds in durations:
+        key = bucket_key(seconds)
+        sketch[key] = sketch.get(key, 0) + 1
+    return sketch
+
+
+def sketch_quantile(sketch, q):
+    total = sum(sketch.values())
+    if not total:
+        return None
+    rank = q * (total - 1)
+    seen = 0
+    for key in sorted(sketch, key=int):
+        seen += sketch[key]
+        if seen > rank:
+            return bucket_value(key)
+    return bucket_value(max(sketch, key=int))
+
+
+def summarize(stats):
+    """Turn a DefectSLAStats row into report fields (durations in hours)."""
+    def hours(seconds):
+        return None if seconds is None else round(seconds / 3600, 2)
+
+    return {
+        'train': stats.train.number,
+        'coach_type': stats.coach_type,
+        'metric': stats.metric,
+        'count': stats.count,
+        'mean_hours': hours(stats.total_seconds / stats.count if stats.count else None),
+        'p50_hours': hours(sketch_quantile(stats.sketch, 0.5)),
+        'p90_hours': hours(sketch_quantile(stats.sketch, 0.9)),
+        'p99_hours': hours(sketch_quantile(stats.sketch, 0.99)),
+    }
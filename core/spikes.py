@@ -0,0 +1,37 @@
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+# Exponentially weighted mean/variance of defects per bucket. Every closed
+# bucket is folded in once, and a run of empty buckets is folded in closed
+# form, so each event costs O(1) however long a baseline sat idle.
+
+
+def bucket_start(moment, minutes):
+    width = minutes * 60
+    seconds = int(moment.timestamp())
+    return datetime.fromtimestamp(seconds - seconds % width, tz=dt_timezone.utc)
+
+
+def buckets_between(start, end, minutes):
+    return int((end - start) / timedelta(minutes=minutes))
+
+
+def fold(mean, variance, value, alpha):
+    diff = value - mean
+    increment = alpha * diff
+    return mean + increment, (1 - alpha) * (variance + diff * increment)
+
+
+def fold_empty(mean, variance, buckets, alpha):
+    # ``buckets`` zero counts in a row: the mean decays by d = (1 - alpha)^k and
+    # the variance works out to d * (variance + mean^2 * (1 - d)).
+    if buckets <= 0:
+        return mean, variance
+    decay = (1 - alpha) ** buckets
+    return mean * decay, decay * (variance + mean * mean * (1 - decay))
+
+
+def z_score(count, mean, variance):
+    # Counts are roughly Poisson, so never trust a spread below sqrt(mean) or 1.
+    spread = math.sqrt(max(variance, mean, 1.0))
+    return (count - mean) / spread
@@ -1,3 +1,509 @@
-from django.test import TestCase
+import io
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .archive import archive_defects
+from .fragments import bump, versions
+from .hotspots import compute_hotspots
+from .media import byte_range, signed_url
+from .paginator import EstimatedCountPaginator
+from .models import (
+    ArchivedDefect, Coach, Defect, DefectHotspot, DefectReport, DefectSLAStats, DefectStatusCount, DefectStatusEvent,
+    DefectType, Depot, StaffProfile, Train, Zone,
+)
+from .sla import add_to_sketch, sketch_quantile
+from .spikes import bucket_start, fold, fold_empty, z_score
+from .throttle import SlidingWindowLimit, check_login_throttle
+from .workflow import claim_defects, record_report, transition_defects
+
+
+class DefectFixtures:
+    """A train with one coach, a passenger and a staff member; defect types come from migration 0014."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.train = Train.objects.create(number='T100', name='Test Express')
+        cls.coach = Coach.objects.create(train=cls.train, coach_number='S1', coach_type='SL')
+        cls.defect_type = DefectType.objects.exclude(name=DefectType.OTHER).first()
+        cls.passenger = User.objects.create_user('passenger')
+        cls.staff = User.objects.create_user('staff')
+
+    def status_counts(self):
+        return dict(DefectStatusCount.objects.filter(coach=self.coach).values_list('status', 'count'))
+
+
+# ----------------------------
+# Duplicate reports
+# ----------------------------
+class RecordReportTests(DefectFixtures, TestCase):
+    def test_same_defect_from_another_passenger_is_merged(self):
+        first, created = record_report(self.coach, self.defect_type, self.passenger)
+        self.assertTrue(created)
+        second, created = record_report(self.coach, self.defect_type, User.objects.create_user('second'))
+
+        self.assertFalse(created)
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(second.occurrence_count, 2)
+        self.assertEqual(DefectReport.objects.filter(defect=first).count(), 2)
+        self.assertEqual(self.status_counts(), {'Pending': 1})
+
+    def test_same_passenger_is_counted_once(self):
+        first, _ = record_report(self.coach, self.defect_type, self.passenger)
+        again, created = record_report(self.coach, self.defect_type, self.passenger)
+
+        self.assertFalse(created)
+        self.assertEqual(again.pk, first.pk)
+        self.assertEqual(again.occurrence_count, 1)
+        self.assertEqual(DefectReport.objects.filter(defect=first).count(), 1)
+
+    def test_other_reports_are_never_merged(self):
+        other = DefectType.objects.get(name=DefectType.OTHER)
+        first, _ = record_report(self.coach, other, self.passenger, custom_text='Broken mirror')
+        second, created = record_report(self.coach, other, self.staff, custom_text='Loose panel')
+
+        self.assertTrue(created)
+        self.assertNotEqual(second.pk, first.pk)
+        self.assertEqual(self.status_counts(), {'Pending': 2})
+
+    def test_report_outside_the_window_opens_a_new_defect(self):
+        first, _ = record_report(self.coach, self.defect_type, self.passenger)
+        hours = settings.DUPLICATE_REPORT_WINDOW_HOURS + 1
+        Defect.objects.filter(pk=first.pk).update(date_reported=timezone.now() - timedelta(hours=hours))
+
+        second, created = record_report(self.coach, self.defect_type, self.staff)
+        self.assertTrue(created)
+        self.assertNotEqual(second.pk, first.pk)
+
+    def test_resolved_defect_is_not_reopened(self):
+        first, _ = record_report(self.coach, self.defect_type, self.passenger)
+        transition_defects([first.id], 'In Progress', self.staff)
+        transition_defects([first.id], 'Resolved', self.staff)
+
+        second, created = record_report(self.coach, self.defect_type, self.passenger)
+        self.assertTrue(created)
+        self.assertNotEqual(second.pk, first.pk)
+        self.assertEqual(self.status_counts(), {'Pending': 1, 'In Progress': 0, 'Resolved': 1})
+
+    @skipUnless(connection.vendor == 'postgresql', "Row locks are only checked on PostgreSQL.")
+    def test_locks_coach_and_stamps_zone_on_postgresql(self):
+        zone = Zone.objects.create(code='NR', name='Northern')
+        train = Train.objects.create(
+            number='T200', name='Zoned Express', depot=Depot.objects.create(zone=zone, code='DLI', name='Delhi'),
+        )
+        coach = Coach.objects.create(train=train, coach_number='B1', coach_type='3A')
+
+        zoned, _ = record_report(coach, self.defect_type, self.passenger)
+        unzoned, _ = record_report(self.coach, self.defect_type, self.passenger)
+        self.assertEqual(zoned.zone, zone)
+        self.assertIsNone(unzoned.zone)
+
+
+class AdminDefectTests(DefectFixtures, TestCase):
+    def test_defect_added_in_admin_is_listed_for_its_reporter(self):
+        self.client.force_login(User.objects.create_superuser('root'))
+        response = self.client.post(reverse('admin:core_defect_add'), {
+            'coach': self.coach.id, 'defect_type': self.defect_type.id, 'reported_by': self.passenger.id,
+            'occurrence_count': 1,
+        })
+        self.assertEqual(response.status_code, 302)
+
+        defect = Defect.objects.get(coach=self.coach)
+        self.assertEqual(list(defect.reports.values_list('reported_by', flat=True)), [self.passenger.id])
+        self.assertEqual(self.status_counts(), {'Pending': 1})
+        self.client.force_login(self.passenger)
+        self.assertEqual(list(self.client.get(reverse('my_defects')).context['defects']), [defect])
+
+
+# ----------------------------
+# Status transitions
+# ----------------------------
+class TransitionTests(DefectFixtures, TestCase):
+    def setUp(self):
+        self.defect, _ = record_report(self.coach, self.defect_type, self.passenger)
+
+    def test_allowed_transition_logs_event_and_moves_count(self):
+        changed = transition_defects([self.defect.id], 'In Progress', self.staff)
+
+        self.assertEqual(changed, {self.defect.id: 'Pending'})
+        self.defect.refresh_from_db()
+        self.assertEqual(self.defect.status, 'In Progress')
+        event = DefectStatusEvent.objects.get(defect=self.defect)
+        self.assertEqual((event.from_status, event.to_status, event.changed_by), ('Pending', 'In Progress', self.staff))
+        self.assertEqual(self.status_counts(), {'Pending': 0, 'In Progress': 1})
+        stats = DefectSLAStats.objects.get(train=self.train, metric=DefectSLAStats.ACKNOWLEDGE)
+        self.assertEqual(stats.count, 1)
+
+    def test_rejected_transition_changes_nothing(self):
+        changed = transition_defects([self.defect.id], 'Resolved', self.staff)
+
+        self.assertEqual(changed, {})
+        self.defect.refresh_from_db()
+        self.assertEqual(self.defect.status, 'Pending')
+        self.assertFalse(DefectStatusEvent.objects.exists())
+        self.assertEqual(self.status_counts(), {'Pending': 1})
+
+    def test_nothing_leaves_resolved(self):
+        transition_defects([self.defect.id], 'In Progress', self.staff)
+        transition_defects([self.defect.id], 'Resolved', self.staff)
+
+        for status in Defect.STATUSES:
+            self.assertEqual(transition_defects([self.defect.id], status, self.staff), {})
+        self.assertEqual(DefectStatusEvent.objects.count(), 2)
+        self.assertEqual(self.status_counts(), {'Pending': 0, 'In Progress': 0, 'Resolved': 1})
+
+    def test_defect_leased_to_someone_else_is_skipped(self):
+        other = User.objects.create_user('other')
+        claim_defects(other, 1)
+
+        self.assertEqual(transition_defects([self.defect.id], 'In Progress', self.staff), {})
+        self.assertEqual(transition_defects([self.defect.id], 'In Progress', other), {self.defect.id: 'Pending'})
+
+    def test_resolving_ends_the_lease(self):
+        claim_defects(self.staff, 1)
+        transition_defects([self.defect.id], 'In Progress', self.staff)
+        transition_defects([self.defect.id], 'Resolved', self.staff)
+
+        self.defect.refresh_from_db()
+        self.assertIsNone(self.defect.claimed_by)
+        self.assertIsNone(self.defect.claim_expires_at)
+
+
+# ----------------------------
+# Archival
+# ----------------------------
+class ArchiveTests(DefectFixtures, TestCase):
+    def test_merged_reporters_survive_archival(self):
+        second = User.objects.create_user('second')
+        defect, _ = record_report(self.coach, self.defect_type, self.passenger)
+        record_report(self.coach, self.defect_type, second)
+        transition_defects([defect.id], 'In Progress', self.staff)
+        transition_defects([defect.id], 'Resolved', self.staff)
+
+        self.assertEqual(archive_defects([defect.id]), 1)
+
+        self.assertFalse(DefectReport.objects.filter(defect_id=defect.id).exists())
+        archived = ArchivedDefect.objects.get(defect_id=defect.id)
+        self.assertEqual(archived.occurrence_count, 2)
+        self.assertEqual(
+            [(r['user'], r['username']) for r in archived.reporters],
+            [(self.passenger.id, 'passenger'), (second.id, 'second')],
+        )
+        self.assertEqual([event['to'] for event in archived.status_history], ['In Progress', 'Resolved'])
+
+
+# ----------------------------
+# Cached page counts
+# ----------------------------
+class PaginatorCountTests(DefectFixtures, TestCase):
+    def setUp(self):
+        cache.clear()
+        record_report(self.coach, self.defect_type, self.passenger)
+
+    def test_count_is_cached_per_query(self):
+        defects = Defect.objects.filter(coach=self.coach)
+        self.assertEqual(EstimatedCountPaginator(defects, 10).count, 1)
+        Defect.objects.create(coach=self.coach, defect_type=self.defect_type, reported_by=self.staff)
+        self.assertEqual(EstimatedCountPaginator(defects, 10).count, 1)
+
+    def test_time_filtered_lists_are_counted_every_time(self):
+        defects = Defect.objects.filter(date_reported__lte=timezone.now())
+        with mock.patch.object(cache, 'set') as cache_set:
+            self.assertEqual(EstimatedCountPaginator(defects, 10, cache_count=False).count, 1)
+        cache_set.assert_not_called()
+
+
+# ----------------------------
+# Fragment versions
+# ----------------------------
+class FragmentVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(FRAGMENT_CACHE_SECONDS=300)
+    def test_bump_retires_the_key_on_commit(self):
+        before = versions()
+        with self.captureOnCommitCallbacks(execute=True):
+            bump('defect')
+            self.assertEqual(versions(), before)
+        after = versions()
+        self.assertEqual(after['defect'], before['defect'] + 1)
+        self.assertEqual(after['train'], before['train'])
+
+    @override_settings(FRAGMENT_CACHE_SECONDS=0)
+    def test_disabled_without_a_shared_cache(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            bump('defect')
+        self.assertEqual(callbacks, [])
+        self.assertEqual(versions(), {'train': 0, 'coach': 0, 'defect': 0})
+
+
+# ----------------------------
+# Hotspots
+# ----------------------------
+class HotspotTests(DefectFixtures, TestCase):
+    def file(self, coach, count):
+        for _ in range(count):
+            Defect.objects.create(coach=coach, defect_type=self.defect_type, reported_by=self.passenger)
+
+    def test_each_zone_and_depot_is_ranked_on_its_own(self):
+        zone = Zone.objects.create(code='SR', name='Southern')
+        depot = Depot.objects.create(zone=zone, code='MAS', name='Chennai')
+        zoned = Train.objects.create(number='T300', name='Southern Mail', depot=depot)
+        self.file(self.coach, 5)
+        self.file(Coach.objects.create(train=zoned, coach_number='A1', coach_type='2A'), 2)
+
+        compute_hotspots(windows=[7], top_n=1)
+
+        ranked = dict(
+            DefectHotspot.objects.filter(scope=DefectHotspot.TRAIN).values_list('area', 'train__number')
+        )
+        self.assertEqual(ranked, {'fleet': 'T100', f'z{zone.id}': 'T300', f'z{zone.id}-d{depot.id}': 'T300'})
+
+
+# ----------------------------
+# SLA sketches
+# ----------------------------
+class SketchTests(TestCase):
+    def test_quantiles_within_bucket_error(self):
+        durations = [hours * 3600 for hours in range(1, 1001)]
+        sketch = add_to_sketch({}, durations)
+
+        for q, exact in ((0.5, 500.5 * 3600), (0.9, 900.1 * 3600), (0.99, 990.01 * 3600)):
+            self.assertAlmostEqual(sketch_quantile(sketch, q) / exact, 1, delta=0.05)
+
+    def test_single_value_and_empty_sketch(self):
+        self.assertIsNone(sketch_quantile({}, 0.5))
+        sketch = add_to_sketch({}, [7200])
+        self.assertAlmostEqual(sketch_quantile(sketch, 0.99) / 7200, 1, delta=0.05)
+
+    def test_sub_second_durations_share_the_first_bucket(self):
+        sketch = add_to_sketch({}, [0, 0.2, 1])
+        self.assertEqual(sketch, {'0': 3})
+
+
+# ----------------------------
+# Login throttling
+# ----------------------------
+class SlidingWindowLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Three attempts per 30-second window; 990 is the start of one.
+        self.limit = SlidingWindowLimit('test', capacity=3, refill_seconds=10)
+
+    def consume_at(self, now):
+        with mock.patch('core.throttle.time.time', return_value=now):
+            return self.limit.consume('Alice')
+
+    def test_previous_window_fades_out(self):
+        for _ in range(3):
+            self.assertEqual(self.consume_at(990), (True, 0))
+        # Refusals count too: four attempts in the full window.
+        self.assertEqual(self.consume_at(990), (False, 45))
+        # Next window: 1 + 4 * (1 - 0/30) > 3, fits once 4 * share <= 1.
+        self.assertEqual(self.consume_at(1020), (False, 23))
+        self.assertEqual(self.consume_at(1043), (True, 0))
+        self.assertEqual(self.consume_at(1043)[0], False)
+
+    def test_quiet_key_starts_fresh(self):
+        self.consume_at(990)
+        for _ in range(3):
+            self.assertEqual(self.consume_at(5010), (True, 0))
+        self.assertFalse(self.consume_at(5010)[0])
+
+    def test_identifiers_are_case_insensitive_and_reset(self):
+        for _ in range(3):
+            self.consume_at(990)
+        with mock.patch('core.throttle.time.time', return_value=990):
+            self.assertFalse(self.limit.consume('ALICE')[0])
+            self.limit.reset('alice')
+            self.assertTrue(self.limit.consume('Alice')[0])
+
+    def test_concurrent_attempts_never_wait_or_overspend(self):
+        with mock.patch('core.throttle.time.time', return_value=990):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(pool.map(lambda _: self.limit.consume('Alice')[0], range(40)))
+        self.assertEqual(results.count(True), 3)
+
+    @override_settings(LOGIN_THROTTLE_RATES={'ip': (10, 60), 'username': (2, 60)})
+    def test_login_throttle_checks_username_limit(self):
+        request = RequestFactory().post('/login/')
+        self.assertEqual(check_login_throttle(request, 'bob'), 0)
+        self.assertEqual(check_login_throttle(request, 'bob'), 0)
+        with self.assertLogs('core.throttle', 'WARNING'):
+            self.assertGreater(check_login_throttle(request, 'bob'), 0)
+        self.assertEqual(check_login_throttle(request, 'carol'), 0)
+
+    @override_settings(LOGIN_THROTTLE_ENABLED=False, LOGIN_THROTTLE_RATES={'ip': (1, 60), 'username': (1, 60)})
+    def test_disabled_throttle_lets_everything_through(self):
+        request = RequestFactory().post('/login/')
+        for _ in range(3):
+            self.assertEqual(check_login_throttle(request, 'bob'), 0)
+
+
+# ----------------------------
+# Spike detection
+# ----------------------------
+class SpikeMathTests(TestCase):
+    def test_z_score_uses_the_larger_spread(self):
+        self.assertEqual(z_score(10, 1.0, 4.0), 4.5)
+        # A quiet baseline never gets a spread below sqrt(mean) or 1.
+        self.assertEqual(z_score(5, 0.0, 0.0), 5.0)
+        self.assertEqual(z_score(13, 9.0, 0.5), 4 / 3)
+
+    def test_fold_empty_matches_folding_zeros(self):
+        alpha = 0.05
+        mean, variance = fold(0.0, 0.0, 8, alpha)
+        mean, variance = fold(mean, variance, 2, alpha)
+        expected = (mean, variance)
+        for _ in range(30):
+            expected = fold(*expected, 0, alpha)
+
+        closed = fold_empty(mean, variance, 30, alpha)
+        self.assertAlmostEqual(closed[0], expected[0])
+        self.assertAlmostEqual(closed[1], expected[1])
+        self.assertEqual(fold_empty(mean, variance, 0, alpha), (mean, variance))
+
+    def test_bucket_start_aligns_to_the_width(self):
+        moment = datetime(2026, 3, 1, 10, 47, 12, tzinfo=dt_timezone.utc)
+        self.assertEqual(bucket_start(moment, 60), datetime(2026, 3, 1, 10, 0, tzinfo=dt_timezone.utc))
+        self.assertEqual(bucket_start(moment, 15), datetime(2026, 3, 1, 10, 45, tzinfo=dt_timezone.utc))
+
+
+# ----------------------------
+# Photo serving
+# ----------------------------
+class ByteRangeTests(TestCase):
+    def test_parses_single_ranges(self):
+        self.assertEqual(byte_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(byte_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(byte_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(byte_range('bytes=-5000', 1000), (0, 999))
+        self.assertEqual(byte_range('bytes=500-5000', 1000), (500, 999))
+
+    def test_unsatisfiable_start_is_returned_past_the_end(self):
+        self.assertEqual(byte_range('bytes=1000-', 1000), (1000, 999))
+
+    def test_malformed_and_multi_ranges_are_ignored(self):
+        for header in ('bytes=-', 'bytes=5-2', 'bytes=0-1,5-6', 'items=0-1', 'bytes=a-b'):
+            self.assertIsNone(byte_range(header, 1000), header)
+
+
+class MediaViewTests(TestCase):
+    name = 'defect_images/photo.jpg'
+    body = bytes(range(256)) * 4
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        path = Path(root.name, self.name)
+        path.parent.mkdir()
+        path.write_bytes(self.body)
+        settings_override = override_settings(MEDIA_ROOT=root.name, MEDIA_OFFLOAD='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_whole_file(self):
+        response = self.client.get(signed_url(self.name))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.body)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_partial_content(self):
+        response = self.client.get(signed_url(self.name), HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f"bytes 10-19/{len(self.body)}")
+        self.assertEqual(b''.join(response.streaming_content), self.body[10:20])
+
+    def test_range_past_the_end(self):
+        response = self.client.get(signed_url(self.name), HTTP_RANGE=f"bytes={len(self.body)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f"bytes */{len(self.body)}")
+
+    def test_stale_if_range_sends_the_whole_file(self):
+        response = self.client.get(signed_url(self.name), HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_bad_signature_is_forbidden(self):
+        url = signed_url(self.name)
+        self.assertEqual(self.client.get(url[:-1] + ('A' if url[-1] != 'A' else 'B')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('media', args=[self.name])).status_code, 403)
+
+
+# ----------------------------
+# Bulk user import
+# ----------------------------
+class ImportUsersTests(TestCase):
+    header = 'username,email,password,role,zone,depot\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.zone = Zone.objects.create(code='WR', name='Western')
+        cls.depot = Depot.objects.create(zone=cls.zone, code='BCT', name='Mumbai Central')
+
+    def import_csv(self, rows, *args):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write(self.header + rows)
+        self.addCleanup(Path(handle.name).unlink)
+        call_command('import_users', handle.name, '--workers=1', '--skip-email', *args, stdout=io.StringIO())
+
+    def test_staff_get_the_zone_or_depot_they_name(self):
+        self.import_csv('zonal,,pw,staff,WR,\ndepot,,pw,staff,,BCT\nrider,,pw,passenger,,\n')
+
+        scopes = dict(StaffProfile.objects.values_list('user__username', 'depot__code'))
+        self.assertEqual(scopes, {'zonal': None, 'depot': 'BCT'})
+        self.assertEqual(StaffProfile.objects.get(user__username='depot').zone, self.zone)
+
+    def test_short_rows_get_empty_fields(self):
+        self.header = 'username,password,role,zone,depot,email,first_name,last_name\n'
+        self.import_csv('zonal,pw,staff,WR\nrider,pw,passenger\n')
+
+        for user in User.objects.filter(username__in=['zonal', 'rider']):
+            self.assertEqual((user.email, user.first_name, user.last_name), ('', '', ''))
+        self.assertTrue(StaffProfile.objects.filter(user__username='zonal', zone=self.zone).exists())
+
+    def test_staff_without_a_scope_need_fleet_wide(self):
+        with self.assertRaisesMessage(CommandError, 'Line 2: staff need a zone or depot'):
+            self.import_csv('roaming,,pw,staff,,\n')
+        self.assertFalse(User.objects.filter(username='roaming').exists())
+
+        self.import_csv('roaming,,pw,staff,,\n', '--fleet-wide')
+        self.assertFalse(StaffProfile.objects.exists())
+
+    def test_unknown_or_mismatched_codes_are_rejected(self):
+        Zone.objects.create(code='CR', name='Central')
+        for row, message in (
+            ('a,,pw,staff,XX,\n', "unknown zone 'XX'"),
+            ('a,,pw,staff,,XX\n', "unknown depot 'XX'"),
+            ('a,,pw,staff,CR,BCT\n', "depot 'BCT' is not in zone 'CR'"),
+            ('a,,pw,passenger,WR,\n', 'zone and depot only apply to staff'),
+        ):
+            with self.assertRaisesMessage(CommandError, message):
+                self.import_csv(row)
+
+
+# ----------------------------
+# Daily jobs
+# ----------------------------
+class DailyJobsTests(TestCase):
+    def test_runs_every_job_and_purges_expired_sessions(self):
+        Session.objects.create(session_key='expired', session_data='', expire_date=timezone.now() - timedelta(days=1))
+        Session.objects.create(session_key='live', session_data='', expire_date=timezone.now() + timedelta(days=1))
+        out = io.StringIO()
+
+        call_command('run_daily_jobs', stdout=out, stderr=io.StringIO())
+
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+        self.assertIn('Ran 4 daily job(s).', out.getvalue())
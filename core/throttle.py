@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import LOGIN_THROTTLED
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------
+# Cache-backed sliding-window limits
+# ----------------------------
+class SlidingWindowLimit:
+    """``capacity`` attempts per window of ``capacity * refill_seconds``.
+
+    Each window is one cache counter. An attempt is allowed while this window's
+    count plus the previous window's, weighted by how much of it still
+    overlaps, stays within ``capacity``, which smooths the burst at a window
+    edge. ``cache.add`` and ``cache.incr`` are atomic on every backend, so
+    concurrent attempts all count without a lock and nothing ever waits.
+    """
+
+    def __init__(self, scope, capacity, refill_seconds):
+        self.scope = scope
+        self.capacity = capacity
+        self.window = capacity * refill_seconds
+
+    def key(self, identifier):
+        digest = hashlib.sha256(identifier.lower().encode()).hexdigest()[:32]
+        return f"throttle:{self.scope}:{digest}"
+
+    def consume(self, identifier):
+        """Count one attempt. Returns ``(allowed, retry_after_seconds)``.
+
+        Refused attempts count too, so hammering a key keeps it shut.
+        """
+        now = time.time()
+        current, elapsed = divmod(now, self.window)
+        key = self.key(identifier)
+        current_key = f"{key}:{int(current)}"
+        cache.add(current_key, 0, timeout=math.ceil(2 * self.window))
+        try:
+            count = cache.incr(current_key)
+        except ValueError:
+            # Evicted between add() and incr(): this attempt opens the window.
+            cache.set(current_key, 1, timeout=math.ceil(2 * self.window))
+            count = 1
+        previous = cache.get(f"{key}:{int(current) - 1}", 0)
+
+        if count + previous * (1 - elapsed / self.window) <= self.capacity:
+            return True, 0
+        return False, self.retry_after(count, previous, elapsed)
+
+    def retry_after(self, count, previous, elapsed):
+        """Seconds until one more attempt would fit."""
+        room = self.capacity - 1
+        if count <= room:
+            # This window has room; wait for the previous one's share to fade.
+            wait = self.window * (1 - (room - count) / previous) - elapsed
+        else:
+            # This window is full; wait until it is the previous one and fading.
+            wait = self.window - elapsed + self.window * (1 - room / count)
+        return max(1, math.ceil(wait))
+
+    def reset(self, identifier):
+        key, current = self.key(identifier), int(time.time() // self.window)
+        cache.delete_many([f"{key}:{current}", f"{key}:{current - 1}"])
+
+
+def login_limits():
+    return {
+        scope: SlidingWindowLimit(f"login:{scope}", capacity, refill_seconds)
+        for scope, (capacity, refill_seconds) in settings.LOGIN_THROTTLE_RATES.items()
+    }
+
+
+def client_ip(request):
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded and settings.TRUST_X_FORWARDED_FOR:
+        # The last hop is the one appended by our own proxy.
+        return forwarded.split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check_login_throttle(request, username):
+    """Count the attempt against the per-IP and per-username limits before any hashing.
+
+    Returns 0 when the attempt may proceed, otherwise the seconds to wait.
+    """
+    if not settings.LOGIN_THROTTLE_ENABLED:
+        return 0
+    limits = login_limits()
+    for scope, identifier in (('ip', client_ip(request)), ('username', username or '')):
+        allowed, retry_after = limits[scope].consume(identifier)
+        if not allowed:
+            record_throttled(scope)
+            return retry_after
+    return 0
+
+
+def reset_login_throttle(username):
+    login_limits()['username'].reset(username or '')
+
+
+def record_throttled(scope):
+    LOGIN_THROTTLED.labels(scope).inc()
+    logger.warning("Login attempt throttled (%s limit reached)", scope)
@@ -0,0 +1,112 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DateField
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .metrics import cache_lookup
+from .models import Defect, DefectCategory, DefectStatusEvent
+from .zones import FLEET, scope_defects, scope_key
+
+# Granularity -> number of buckets returned, newest last.
+GRANULARITIES = {'day': 30, 'week': 26, 'month': 12}
+
+
+def bucket_floor(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def previous_bucket(start, granularity):
+    if granularity == 'week':
+        return start - timedelta(days=7)
+    if granularity == 'month':
+        return (start - timedelta(days=1)).replace(day=1)
+    return start - timedelta(days=1)
+
+
+def bucket_starts(granularity, now=None):
+    """Start dates (local time) of the last N buckets, oldest first."""
+    current = bucket_floor(timezone.localdate(now), granularity)
+    starts = [current]
+    while len(starts) < GRANULARITIES[granularity]:
+        starts.append(previous_bucket(starts[-1], granularity))
+    return starts[::-1]
+
+
+def cache_key(granularity, train_id, start, scope=FLEET):
+    # Namespaced by zone/depot so each division caches only its own buckets.
+    return f"trends:{scope_key(scope)}:{granularity}:{train_id or 'all'}:{start.isoformat()}"
+
+
+def bucket_counts(granularity, since, train_id=None, scope=FLEET):
+    """``{bucket_date: {'reports': {category_id: n}, 'resolved': {...}}}`` from ``since`` on."""
+    since = timezone.make_aware(datetime.combine(since, time.min))
+    reports = scope_defects(Defect.objects.filter(date_reported__gte=since), scope)
+    resolved = scope_defects(
+        DefectStatusEvent.objects.filter(to_status='Resolved', created_at__gte=since), scope, 'defect__'
+    )
+    if train_id:
+        reports = reports.filter(coach__train_id=train_id)
+        resolved = resolved.filter(defect__coach__train_id=train_id)
+
+    counts = defaultdict(lambda: {'reports': {}, 'resolved': {}})
+    series = (
+        ('reports', reports, 'date_reported', 'defect_type__category_id'),
+        ('resolved', resolved, 'created_at', 'defect__defect_type__category_id'),
+    )
+    for name, queryset, date_field, category_field in series:
+        rows = (
+            queryset.annotate(bucket=Trunc(date_field, granularity, output_field=DateField()))
+            .values_list('bucket', category_field)
+            .annotate(n=Count('id'))
+            .order_by()
+        )
+        for bucket, category_id, n in rows:
+            counts[bucket][name][category_id] = n
+    return counts
+
+
+def trend_series(granularity, train_id=None, scope=FLEET, now=None):
+    """Reports and resolutions per category for the last N buckets.
+
+    Closed buckets are cached for ``TREND_BUCKET_CACHE_SECONDS`` and only the
+    missing ones plus the current bucket are queried, in one pass. New reports
+    and resolutions only land in the current bucket, which is never cached.
+    """
+    starts = bucket_starts(granularity, now)
+    current = starts[-1]
+    keys = {start: cache_key(granularity, train_id, start, scope) for start in starts[:-1]}
+    cached = cache.get_many(keys.values())
+
+    buckets = {start: cached[key] for start, key in keys.items() if key in cached}
+    missing = [start for start in starts if start not in buckets]
+    cache_lookup('trend_bucket', len(buckets), len(missing) - 1)
+    fresh = bucket_counts(granularity, missing[0], train_id, scope)
+    empty = {'reports': {}, 'resolved': {}}
+    for start in missing:
+        buckets[start] = fresh.get(start, empty)
+    cache.set_many(
+        {keys[start]: buckets[start] for start in missing if start != current}, settings.TREND_BUCKET_CACHE_SECONDS,
+    )
+
+    categories = list(DefectCategory.objects.values_list('id', 'name'))
+    return {
+        'granularity': granularity,
+        'train': train_id,
+        'buckets': [start.isoformat() for start in starts],
+        'categories': [name for _, name in categories],
+        **{
+            series: {
+                name: [buckets[start][series].get(category_id, 0) for start in starts]
+                for category_id, name in categories
+            }
+            for series in ('reports', 'resolved')
+        },
+    }
@@ -9,10 +9,23 @@ urlpatterns = [
     path('logout/', auth_views.LogoutView.as_view(next_page='login'), name='logout'),
     path('dashboard/', views.dashboard, name='dashboard'),
     path('report-defect/', views.report_defect, name='report_defect'),
+    path('report-defect/coaches/<int:train_id>/', views.report_defect_coaches, name='report_defect_coaches'),
+    path('trains/search/', views.search_trains, name='search_trains'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('profiles/', views.profiles, name='profiles'),
+    path('profiles/<str:name>/', views.profile_detail, name='profile_detail'),
+    path('profiles/<str:name>/download/', views.profile_download, name='profile_download'),
+    path('media/<path:name>', views.media, name='media'),
     path('get-coaches/<int:train_id>/', views.get_coaches, name='get_coaches'),
     path('my-defects/', views.my_defects, name='my_defects'),
     path('staff-dashboard/', views.staff_dashboard, name='staff_dashboard'),
+    path('staff-dashboard/bulk-update/', views.bulk_update_status, name='bulk_update_status'),
+    path('staff-dashboard/claim/', views.claim_work_orders, name='claim_work_orders'),
+    path('staff-dashboard/release/', views.release_work_orders, name='release_work_orders'),
     path('admin-dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin-dashboard/sla/', views.sla_report, name='sla_report'),
+    path('admin-dashboard/trends/', views.trend_data, name='trend_data'),
+    path('admin-dashboard/archive/export/', views.export_archived_defects, name='export_archived_defects'),
     path('add-train/', views.add_train, name='add_train'),
     path('delete-train/<int:train_id>/', views.delete_train, name='delete_train'),
     path('add-coach/<int:train_id>/', views.add_coach, name='add_coach'),
@@ -1,18 +1,38 @@
+import csv
+import hashlib
+from datetime import timedelta
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.contrib.auth import authenticate, login
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User, Group
 from django.contrib.auth.views import LoginView
+from django.core.cache import cache
 from django.core.mail import send_mail
-from django.views.decorators.http import require_POST
-from django.http import JsonResponse
+from django.views.decorators.http import require_POST, require_safe
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.urls import reverse_lazy,reverse
-from django.db.models import Count, Q
-from django.db import IntegrityError
+from django.db.models import Case, Count, Prefetch, Q, When
+from django.db import IntegrityError, transaction
 from django.conf import settings
-from .models import Train, Coach, Defect, PassengerProfile
+from django.utils import timezone
+from .models import Train, Coach, Defect, DefectCategory, DefectType, DefectSLAStats, DefectHotspot, DefectSpike, ArchivedDefect, Depot, PassengerProfile, StaffProfile
 from .forms import PassengerRegisterForm
+from .fragments import bump, versions
+from .media import check_signature, link_expiry, serve_file
+from .metrics import cache_lookup, render_metrics
+from .notifications import send_status_update_batch, welcome_message
+from .paginator import EstimatedCountPaginator
+from .partitions import recent_range
+from .profiling import list_profiles, load_profile, profile_path
+from .sla import summarize
+from .throttle import check_login_throttle, reset_login_throttle
+from .trends import GRANULARITIES, trend_series
+from .workflow import claim_defects, record_report, release_defects, transition_defects
+from .zones import (
+    FLEET, scope_defects, scope_depots, scope_key, scope_trains, staff_scope, zone_rollup,
+)
 
 # ----------------------------
 # Home redirects to login
@@ -24,31 +44,29 @@ def home(request):
 # ----------------------------
 # Custom Login View with role-based redirect
 # ----------------------------
-from django.contrib import messages
-from django.contrib.auth.views import LoginView
-from django.contrib.auth import authenticate
-from django.contrib.auth.models import User
-from django.urls import reverse_lazy
-
 class CustomLoginView(LoginView):
     template_name = 'core/login.html'
 
+    def post(self, request, *args, **kwargs):
+        retry_after = check_login_throttle(request, request.POST.get('username'))
+        if retry_after:
+            messages.error(request, f"Too many login attempts. Try again in {retry_after} seconds.")
+            return redirect(reverse('login'))
+        return super().post(request, *args, **kwargs)
+
+    def form_valid(self, form):
+        reset_login_throttle(form.get_user().get_username())
+        return super().form_valid(form)
+
     def form_invalid(self, form):
+        # The form has already run authenticate() once; telling an unknown
+        # username from a wrong password only needs an indexed lookup.
         username = self.request.POST.get('username')
-        password = self.request.POST.get('password')
 
-        try:
-            user = User.objects.get(username=username)
-        except User.DoesNotExist:
+        if not User.objects.filter(username=username).exists():
             messages.error(self.request, "Username does not exist.")
-            return redirect(reverse('login'))
-
-        # If username exists, check password
-        user = authenticate(username=username, password=password)
-        if user is None:
-            messages.error(self.request, "Incorrect password.")
         else:
-            messages.error(self.request, "Invalid login credentials.")  # fallback, usually won't hit
+            messages.error(self.request, "Incorrect password.")
 
         return redirect(reverse('login'))
 
@@ -90,13 +108,21 @@ def passenger_dashboard(request):
 # ----------------------------
 # Report Defect View
 # ----------------------------
+def categories_with_types():
+    return DefectCategory.objects.prefetch_related(
+        Prefetch('types', queryset=DefectType.objects.filter(is_active=True))
+    )
+
+
 @login_required
 def report_defect(request):
-    trains = Train.objects.all()
+    defect_categories = categories_with_types()
     coaches = []
-    selected_train_id = request.POST.get("train")
+    selected_train = None
+    selected_train_id = request.POST.get("train") or request.GET.get("train")
 
-    if selected_train_id:
+    if selected_train_id and selected_train_id.isdigit():
+        selected_train = Train.objects.filter(id=selected_train_id).first()
         coaches = Coach.objects.filter(train_id=selected_train_id)
 
     if request.method == "POST" and 'selected_coaches' in request.POST:
@@ -109,24 +135,23 @@ def report_defect(request):
             except Coach.DoesNotExist:
                 continue
 
-            defects = request.POST.getlist(f'defects_{coach_id}')
+            defect_type_ids = request.POST.getlist(f'defects_{coach_id}')
             custom_defect = request.POST.get(f'custom_{coach_id}')
             image = request.FILES.get(f'image_{coach_id}')
 
-            for defect_type in defects:
-                custom_text = custom_defect if defect_type == 'Other' else ''
-                defect = Defect.objects.create(
-                    coach=coach,
-                    defect_type=defect_type,
-                    custom_defect_text=custom_text,
-                    image=image,
-                    reported_by=request.user
-                )
+            defect_types = DefectType.objects.filter(
+                id__in=[i for i in defect_type_ids if i.isdigit()], is_active=True
+            )
+            for defect_type in defect_types:
+                is_other = defect_type.name == DefectType.OTHER
+                custom_text = custom_defect if is_other else ''
+                defect, created = record_report(coach, defect_type, request.user, custom_text, image)
+                merged = '' if created else f"\n🔁 Already reported — added to Defect ID {defect.id} ({defect.occurrence_count} reports)"
                 defect_summaries.append(f"""
 🚆 Coach: {coach}
-🔧 Defect: {defect_type if defect_type != 'Other' else 'Other - ' + custom_text}
+🔧 Defect: {defect_type if not is_other else 'Other - ' + custom_text}
 📸 Photo: {'Yes' if image else 'No'}
-📌 Status: {defect.status}
+📌 Status: {defect.status}{merged}
 --------------------------""")
 
         if defect_summaries:
@@ -150,12 +175,103 @@ SmartCoach Team
         return redirect('dashboard')
 
     return render(request, 'core/report_defect.html', {
-        'trains': trains,
         'coaches': coaches,
-        'selected_train_id': selected_train_id
+        'defect_categories': defect_categories,
+        'selected_train': selected_train,
+    })
+
+
+@login_required
+def report_defect_coaches(request, train_id):
+    # Coach and defect checkboxes for one train, swapped into the report form.
+    return render(request, 'core/report_defect_coaches.html', {
+        'coaches': Coach.objects.filter(train_id=train_id),
+        'defect_categories': categories_with_types(),
     })
 
 
+# ----------------------------
+# Prometheus scrape
+# ----------------------------
+def metrics(request):
+    token = settings.METRICS_TOKEN
+    authorized = request.headers.get('Authorization') == f"Bearer {token}" if token else settings.DEBUG
+    if not authorized:
+        return HttpResponse(status=403)
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
+
+# ----------------------------
+# Stored request profiles
+# ----------------------------
+@staff_member_required
+def profiles(request):
+    return render(request, 'core/profiles.html', {'profiles': list_profiles()})
+
+
+@staff_member_required
+def profile_detail(request, name):
+    sort = request.GET.get('sort', 'cumulative')
+    if sort not in ('cumulative', 'tottime', 'ncalls'):
+        sort = 'cumulative'
+    profile = load_profile(name, sort)
+    if profile is None:
+        raise Http404("Profile not found.")
+    return render(request, 'core/profile_detail.html', {'profile': profile, 'sort': sort})
+
+
+@staff_member_required
+def profile_download(request, name):
+    path = profile_path(name, '.prof')
+    if path is None:
+        raise Http404("Profile not found.")
+    return FileResponse(path.open('rb'), as_attachment=True, filename=path.name)
+
+
+# ----------------------------
+# Defect photos
+# ----------------------------
+@require_safe
+def media(request, name):
+    # The signed link is the authorization, so the front server or a browser
+    # can fetch it without a session.
+    if not check_signature(name, request.GET.get('e'), request.GET.get('s')):
+        return HttpResponseForbidden("This photo link is invalid or has expired.")
+    return serve_file(request, name)
+
+
+# ----------------------------
+# Train typeahead
+# ----------------------------
+@login_required
+def search_trains(request):
+    query = ' '.join(request.GET.get('q', '').split()).upper()[:50]
+    if not query:
+        return JsonResponse({'trains': []})
+
+    key = f"trains:search:{hashlib.md5(query.encode()).hexdigest()}"
+    trains = cache.get(key)
+    cache_lookup('train_search', trains is not None, trains is None)
+    if trains is None:
+        limit = settings.TRAIN_SEARCH_LIMIT
+        prefix = Q(number__istartswith=query) | Q(name__istartswith=query)
+        # Prefix matches first (number before name); substring matches on the
+        # name only fill what is left, so the common case stays an index scan.
+        trains = list(
+            Train.objects.filter(prefix)
+            .annotate(match=Case(When(number__istartswith=query, then=0), default=1))
+            .order_by('match', 'number')
+            .values('id', 'number', 'name')[:limit]
+        )
+        if len(trains) < limit:
+            trains += Train.objects.filter(name__icontains=query).exclude(prefix).order_by('number').values(
+                'id', 'number', 'name'
+            )[:limit - len(trains)]
+        cache.set(key, trains, settings.TRAIN_SEARCH_CACHE_SECONDS)
+    return JsonResponse({'trains': trains})
+
+
 # ----------------------------
 # View Coaches for Train (AJAX)
 # ----------------------------
@@ -173,45 +289,137 @@ def get_coaches(request, train_id):
 def is_staff(user):
     return user.groups.filter(name='Maintenance Staff').exists() or user.is_superuser
 
+WINDOW_CHOICES = [7, 30, 90, 365, 0]
+
+
+def date_window(request):
+    """Return the ``?days=`` window (0 means all time) and the user's Defects reported in it.
+
+    Filtering on date_reported lets PostgreSQL prune old monthly partitions;
+    the zone/depot filter keeps to the user's division.
+    """
+    days = request.GET.get('days', '')
+    days = int(days) if days.isdigit() else settings.DEFECT_RECENT_WINDOW_DAYS
+    defects = scope_defects(Defect.objects.all(), staff_scope(request.user))
+    if days:
+        since, until = recent_range(days)
+        defects = defects.filter(date_reported__gte=since, date_reported__lt=until)
+    return days, defects
+
+
 @user_passes_test(is_staff)
 def staff_dashboard(request):
-    defects = Defect.objects.select_related('coach__train', 'reported_by').order_by('-date_reported')
+    days, defects = date_window(request)
+    mine = request.GET.get('mine') == '1'
+    if mine:
+        defects = defects.filter(claimed_by=request.user, claim_expires_at__gt=timezone.now())
+    defects = defects.select_related('coach__train', 'reported_by', 'defect_type', 'claimed_by').order_by('-date_reported')
 
     if request.method == 'POST':
         defect_id = request.POST.get('defect_id')
         new_status = request.POST.get('status')
 
         try:
-            defect = Defect.objects.get(id=defect_id)
-            previous_status = defect.status
-            defect.status = new_status
-            defect.save()
-
-            messages.success(request, f"Defect ID {defect.id} updated to '{new_status}'")
-
-            subject = "SmartCoach | Defect Status Updated 🔄"
-            message = f"""
-Dear {defect.reported_by.first_name or defect.reported_by.username},
+            defect = (
+                scope_defects(Defect.objects, staff_scope(request.user))
+                .select_related('coach__train', 'reported_by', 'defect_type', 'claimed_by')
+                .prefetch_related('reports__reported_by')
+                .get(id=defect_id)
+            )
+        except (Defect.DoesNotExist, ValueError):
+            messages.error(request, "Defect not found.")
+        else:
+            previous_statuses = transition_defects([defect.id], new_status, request.user)
+            if previous_statuses:
+                messages.success(request, f"Defect ID {defect.id} updated to '{new_status}'")
+                send_status_update_batch([defect], previous_statuses, new_status)
+            elif defect.is_claimed_by_other(request.user):
+                messages.error(request, f"Defect ID {defect.id} is claimed by {defect.claimed_by.username} until {timezone.localtime(defect.claim_expires_at):%H:%M}.")
+            else:
+                messages.error(request, f"Defect ID {defect.id} cannot move from '{defect.status}' to '{new_status}'.")
+
+    # "Mine" filters on the live lease expiry, and one user's claims are few.
+    page = EstimatedCountPaginator(defects, 50, cache_count=not mine).get_page(request.GET.get('page'))
+
+    # The queue rows and train picker are cached fragments; their querysets
+    # stay lazy and only run on a miss.
+    return render(request, 'core/staff_dashboard.html', {
+        'defects': page,
+        'page_obj': page,
+        'days': days,
+        'window_choices': WINDOW_CHOICES,
+        'mine': mine,
+        'trains': scope_trains(Train.objects.order_by('number'), staff_scope(request.user)),
+        'max_claim': settings.WORK_ORDER_MAX_CLAIM,
+        # Only statuses some transition leads to; Pending is never a target.
+        'bulk_statuses': [s for s in Defect.STATUSES if any(s in targets for targets in Defect.TRANSITIONS.values())],
+        'versions': versions(),
+        'scope_key': scope_key(staff_scope(request.user)),
+        'queue_owner': request.user.pk if mine else '',
+        # Photo links in the rows are signed until then.
+        'media_expiry': link_expiry(),
+        'fragment_seconds': settings.FRAGMENT_CACHE_SECONDS,
+    })
 
-Your defect report has been updated.
 
-🆔 Defect ID: {defect.id}
-🚆 Train: {defect.coach.train.name} ({defect.coach.train.number})
-🚃 Coach: {defect.coach.coach_number}
-🔧 Defect Type: {defect.defect_type}
+@require_POST
+@user_passes_test(is_staff)
+def bulk_update_status(request):
+    new_status = request.POST.get('status')
+    defect_ids = [i for i in request.POST.getlist('defect_ids') if i.isdigit()]
+    if new_status not in Defect.STATUSES or not defect_ids:
+        return JsonResponse({'error': "Select at least one defect and a valid status."}, status=400)
+
+    previous_statuses = transition_defects(defect_ids, new_status, request.user)
+
+    updated = Defect.objects.filter(id__in=previous_statuses).select_related(
+        'coach__train', 'reported_by', 'defect_type'
+    ).prefetch_related('reports__reported_by')
+    notified = send_status_update_batch(updated, previous_statuses, new_status)
+
+    return JsonResponse({
+        'updated': sorted(previous_statuses),
+        'skipped': sorted({int(i) for i in defect_ids} - set(previous_statuses)),
+        'status': new_status,
+        'notified': notified,
+    })
 
-🟡 Previous Status: {previous_status}
-🟢 Updated Status: {new_status}
 
-Regards,
-SmartCoach Team
-"""
-            send_mail(subject, message, settings.EMAIL_HOST_USER, [defect.reported_by.email], fail_silently=True)
+@require_POST
+@user_passes_test(is_staff)
+def claim_work_orders(request):
+    count = request.POST.get('count', '10')
+    train_id = request.POST.get('train')
+    if not count.isdigit() or int(count) < 1:
+        return JsonResponse({'error': "Enter how many defects to claim."}, status=400)
+    count = min(int(count), settings.WORK_ORDER_MAX_CLAIM)
+
+    defect_ids, expires_at = claim_defects(
+        request.user, count, int(train_id) if train_id and train_id.isdigit() else None
+    )
+    claimed = Defect.objects.filter(id__in=defect_ids).select_related('coach__train', 'defect_type')
+
+    return JsonResponse({
+        'claimed': [
+            {
+                'id': d.id,
+                'train': d.coach.train.number,
+                'coach': d.coach.coach_number,
+                'defect_type': str(d.defect_type),
+                'status': d.status,
+                'occurrence_count': d.occurrence_count,
+            }
+            for d in sorted(claimed, key=lambda d: (-d.occurrence_count, d.date_reported))
+        ],
+        'lease_expires_at': expires_at.isoformat(),
+    })
 
-        except Defect.DoesNotExist:
-            messages.error(request, "Defect not found.")
 
-    return render(request, 'core/staff_dashboard.html', {'defects': defects})
+@require_POST
+@user_passes_test(is_staff)
+def release_work_orders(request):
+    defect_ids = [i for i in request.POST.getlist('defect_ids') if i.isdigit()]
+    return JsonResponse({'released': release_defects(request.user, defect_ids)})
 
 
 # ----------------------------
@@ -219,8 +427,9 @@ SmartCoach Team
 # ----------------------------
 @login_required
 def my_defects(request):
-    defects = Defect.objects.filter(reported_by=request.user).order_by('-date_reported')
-    return render(request, 'core/my_defects.html', {'defects': defects})
+    defects = Defect.objects.filter(reports__reported_by=request.user).select_related('coach', 'defect_type').order_by('-date_reported')
+    page = EstimatedCountPaginator(defects, 20).get_page(request.GET.get('page'))
+    return render(request, 'core/my_defects.html', {'defects': page, 'page_obj': page})
 
 
 # ----------------------------
@@ -231,36 +440,113 @@ def admin_dashboard(request):
     if not request.user.is_superuser:
         return redirect('dashboard')
 
-    status_counts = Defect.objects.values('status').annotate(count=Count('id'))
-
-    electrical_q = Q(defect_type__icontains='light') | Q(defect_type__icontains='fan') | Q(defect_type__icontains='charging') | Q(defect_type__icontains='ac')
-    mechanical_q = Q(defect_type__icontains='seat') | Q(defect_type__icontains='door') | Q(defect_type__icontains='chain') | Q(defect_type__icontains='handrest')
-    civil_q = Q(defect_type__icontains='toilet') | Q(defect_type__icontains='mirror') | Q(defect_type__icontains='smell') | Q(defect_type__icontains='leak') | Q(defect_type__icontains='coach') | Q(defect_type__icontains='window')
-
-    electrical_count = Defect.objects.filter(electrical_q).count()
-    mechanical_count = Defect.objects.filter(mechanical_q).count()
-    civil_count = Defect.objects.filter(civil_q).count()
-    total_defects = Defect.objects.count()
-    others_count = total_defects - (electrical_count + mechanical_count + civil_count)
-
-    defect_type_counts = [
-        {'defect_type': 'Electrical', 'count': electrical_count},
-        {'defect_type': 'Mechanical', 'count': mechanical_count},
-        {'defect_type': 'Civil', 'count': civil_count},
-        {'defect_type': 'Others', 'count': others_count},
-    ]
-
-    pending_count = Defect.objects.filter(status='Pending').count()
-    trains = Train.objects.all()
+    scope = staff_scope(request.user)
+    fragment_versions = versions()
+    days, defects = date_window(request)
+    status_counts = defects.values('status').annotate(count=Count('id'))
+
+    # Called by the template, so a cached chart fragment skips both queries.
+    def defect_type_counts():
+        category_totals = dict(
+            defects.values_list('defect_type__category_id').annotate(count=Count('id'))
+        )
+        return [
+            {'defect_type': category.name, 'count': category_totals.get(category.id, 0)}
+            for category in DefectCategory.objects.all()
+        ]
+
+    spikes = (
+        scope_trains(DefectSpike.objects, scope, 'train__').filter(detected_at__gte=timezone.now() - timedelta(hours=settings.SPIKE_DASHBOARD_HOURS))
+        .select_related('train', 'defect_type')
+        .order_by('-detected_at')[:10]
+    )
+    trains = scope_trains(Train.objects.select_related('depot'), scope)
+
+    # Precomputed by the compute_hotspots job; use the nearest window it covers.
+    hotspot_windows = settings.HOTSPOT_WINDOW_DAYS
+    hotspot_window = days if days in hotspot_windows else max(hotspot_windows)
+    hotspots = list(
+        DefectHotspot.objects.filter(area=scope_key(scope), window_days=hotspot_window)
+        .select_related('train', 'coach', 'top_defect_type')
+    )
 
     return render(request, 'core/admin_dashboard.html', {
         'defect_type_counts': defect_type_counts,
-        'status_counts': list(status_counts),
-        'pending_count': pending_count,
+        'status_counts': status_counts,
+        'spikes': spikes,
         'trains': trains,
+        'days': days,
+        'window_choices': WINDOW_CHOICES,
+        'hotspot_window': hotspot_window,
+        'coach_hotspots': [h for h in hotspots if h.scope == DefectHotspot.COACH],
+        'train_hotspots': [h for h in hotspots if h.scope == DefectHotspot.TRAIN],
+        'statuses': Defect.STATUSES,
+        'zone_rollup': zone_rollup(scope),
+        'depots': scope_depots(Depot.objects.select_related('zone'), scope),
+        'scoped': scope != FLEET,
+        'versions': fragment_versions,
+        'scope_key': scope_key(scope),
+        'fragment_seconds': settings.FRAGMENT_CACHE_SECONDS,
     })
 
 
+@login_required
+def trend_data(request):
+    if not request.user.is_superuser:
+        return redirect('dashboard')
+
+    granularity = request.GET.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return JsonResponse({'error': f"granularity must be one of {', '.join(GRANULARITIES)}."}, status=400)
+    train_id = request.GET.get('train')
+    train_id = int(train_id) if train_id and train_id.isdigit() else None
+    return JsonResponse(trend_series(granularity, train_id, staff_scope(request.user)))
+
+
+@login_required
+def sla_report(request):
+    if not request.user.is_superuser:
+        return redirect('dashboard')
+
+    stats = scope_trains(DefectSLAStats.objects, staff_scope(request.user), 'train__')
+    stats = stats.select_related('train').order_by('train__number', 'coach_type', 'metric')
+    return JsonResponse({'groups': [summarize(row) for row in stats]})
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+ARCHIVE_EXPORT_FIELDS = [
+    'defect_id', 'train_number', 'train_name', 'coach_number', 'coach_type', 'defect_type',
+    'category', 'custom_defect_text', 'reported_by_username', 'date_reported', 'resolved_at',
+]
+
+
+@login_required
+def export_archived_defects(request):
+    if not request.user.is_superuser:
+        return redirect('dashboard')
+
+    rows = ArchivedDefect.objects.order_by('date_reported').values_list(*ARCHIVE_EXPORT_FIELDS)
+    scope = staff_scope(request.user)
+    if scope != FLEET:
+        rows = rows.filter(train_number__in=scope_trains(Train.objects, scope).values('number'))
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in _with_header(ARCHIVE_EXPORT_FIELDS, rows.iterator(chunk_size=2000))),
+        content_type='text/csv',
+    )
+    response['Content-Disposition'] = 'attachment; filename="archived_defects.csv"'
+    return response
+
+
+def _with_header(header, rows):
+    yield header
+    yield from rows
+
+
 # ----------------------------
 # Register Passenger
 # ----------------------------
@@ -280,21 +566,7 @@ def register_passenger(request):
                 gender = form.cleaned_data['gender']
                 PassengerProfile.objects.create(user=user, gender=gender)
 
-                subject = 'Welcome to SmartCoach! 🚆'
-                message = f'''
-Dear {user.first_name},
-
-Thank you for registering on SmartCoach Railway Defect Reporting.
-
-👤 Username: {user.username}
-🔑 Password: {raw_password}
-
-You can now login and start reporting issues.
-
-Regards,
-SmartCoach Team 🚆
-'''
-                send_mail(subject, message, settings.EMAIL_HOST_USER, [user.email], fail_silently=False)
+                send_mail(*welcome_message(user, raw_password), fail_silently=False)
 
                 messages.success(request, "Registration successful! Login credentials sent to your email.")
                 return redirect('login')
@@ -311,14 +583,28 @@ SmartCoach Team 🚆
 # ----------------------------
 # Add Maintenance Staff
 # ----------------------------
+def chosen_depot(request, scope):
+    """The ``depot`` posted by an admin form, if it lies within ``scope``."""
+    depot_id = request.POST.get('depot', '')
+    return scope_depots(Depot.objects, scope).filter(id=depot_id).first() if depot_id.isdigit() else None
+
+
 def add_maintenance_staff(request):
     if request.method == 'POST':
         username = request.POST.get('username')
         password = request.POST.get('password')
+        scope = staff_scope(request.user)
+        depot = chosen_depot(request, scope)
         try:
-            user = User.objects.create_user(username=username, password=password)
-            group = Group.objects.get(name='Maintenance Staff')
-            user.groups.add(group)
+            with transaction.atomic():
+                user = User.objects.create_user(username=username, password=password)
+                group = Group.objects.get(name='Maintenance Staff')
+                user.groups.add(group)
+                # New staff work at the chosen depot, else within the admin's own scope.
+                if depot or scope != FLEET:
+                    StaffProfile.objects.create(
+                        user=user, zone_id=scope[0], depot_id=depot.id if depot else scope[1]
+                    )
             messages.success(request, "Maintenance Staff added successfully.")
         except IntegrityError:
             messages.error(request, "Username already exists.")
@@ -332,17 +618,24 @@ def add_maintenance_staff(request):
 def add_train(request):
     number = request.POST.get('train_number', '').strip()
     name = request.POST.get('train_name', '').strip()
+    scope = staff_scope(request.user)
+    depot = chosen_depot(request, scope)
 
     if not number or not name:
         messages.error(request, "Train number and name are required.")
         return redirect('admin_dashboard')
 
+    if depot is None and scope != FLEET:
+        messages.error(request, "Choose the depot that maintains this train.")
+        return redirect('admin_dashboard')
+
     if Train.objects.filter(number__iexact=number).exists():
         messages.error(request, "Train with this number already exists.")
         return redirect('admin_dashboard')
 
     try:
-        Train.objects.create(number=number, name=name)
+        Train.objects.create(number=number, name=name, depot=depot)
+        bump('train')
         messages.success(request, "Train added successfully.")
     except IntegrityError:
         messages.error(request, "Error while adding the train.")
@@ -351,7 +644,8 @@ def add_train(request):
 
 @require_POST
 def delete_train(request, train_id):
-    Train.objects.filter(id=train_id).delete()
+    scope_trains(Train.objects.filter(id=train_id), staff_scope(request.user)).delete()
+    bump('train', 'coach', 'defect')
     messages.success(request, "Train deleted successfully.")
     return redirect('admin_dashboard')
 
@@ -365,16 +659,18 @@ def add_coach(request, train_id):
     coach_type = request.POST.get('coach_type')
 
     if coach_number and coach_type:
-        train = Train.objects.get(id=train_id)
+        train = get_object_or_404(scope_trains(Train.objects, staff_scope(request.user)), id=train_id)
         Coach.objects.create(train=train, coach_number=coach_number, coach_type=coach_type)
+        bump('coach')
         messages.success(request, f"Coach {coach_number} added to {train.name}.")
 
     return redirect('admin_dashboard')
 
 def delete_coach(request, coach_id):
-    coach = get_object_or_404(Coach, id=coach_id)
+    coach = get_object_or_404(scope_trains(Coach.objects, staff_scope(request.user), 'train__'), id=coach_id)
     coach_number = coach.coach_number
     train_name = coach.train.name
     coach.delete()
+    bump('coach', 'defect')
     messages.success(request, f"Coach {coach_number} removed from {train_name}.")
     return redirect('admin_dashboard')
@@ -0,0 +1,72 @@
+import logging
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------
+# Startup work moved off the first request
+# ----------------------------
+def load_urls():
+    """Import every URLconf and view module and compile the route regexes."""
+    resolver = get_resolver()
+    return len(resolver.reverse_dict)
+
+
+def load_templates():
+    """Compile the project's templates into the cached template loader."""
+    count = 0
+    for engine in engines.all():
+        for directory in map(Path, engine.template_dirs):
+            if not directory.is_relative_to(settings.BASE_DIR):
+                continue
+            for path in sorted(directory.rglob('*.html')):
+                try:
+                    engine.get_template(path.relative_to(directory).as_posix())
+                except TemplateSyntaxError:
+                    logger.exception("Template %s failed to compile during warm-up", path)
+                    continue
+                count += 1
+    return count
+
+
+def connect_databases():
+    """Open this thread's persistent connections (CONN_MAX_AGE > 0) ahead of time.
+
+    Django connections are per thread, so this only helps when requests run on
+    the calling thread, as with gunicorn's default sync worker.
+    """
+    opened = 0
+    for connection in connections.all():
+        if not connection.settings_dict['CONN_MAX_AGE']:
+            continue
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            logger.warning("Could not connect to database %r during warm-up", connection.alias, exc_info=True)
+            continue
+        opened += 1
+    return opened
+
+
+def warm_up(databases=True):
+    """Run the warm-up steps and return ``{step: seconds}``.
+
+    Pass ``databases=False`` in a process that forks workers afterwards: a
+    connection opened there would be shared by every child.
+    """
+    steps = [('urls', load_urls), ('templates', load_templates)]
+    if databases:
+        steps.append(('databases', connect_databases))
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - started
+    return timings
@@ -0,0 +1,273 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .fragments import bump
+from .models import (
+    Coach, Defect, DefectRateBaseline, DefectReport, DefectSLAStats, DefectSpike, DefectStatusCount, DefectStatusEvent,
+    DefectType,
+)
+from .metrics import IMAGE_SECONDS
+from .notifications import send_spike_alert
+from .sla import add_to_sketch
+from .spikes import bucket_start, buckets_between, fold, fold_empty, z_score
+from .zones import scope_defects, staff_scope
+
+SLA_METRICS = {
+    'In Progress': DefectSLAStats.ACKNOWLEDGE,
+    'Resolved': DefectSLAStats.RESOLVE,
+}
+
+
+# ----------------------------
+# Reporting with duplicate collapsing
+# ----------------------------
+def record_report(coach, defect_type, user, custom_text='', image=None):
+    """File a passenger report, attaching it to a matching open defect if there is one.
+
+    A report of the same defect type on the same coach within
+    ``DUPLICATE_REPORT_WINDOW_HOURS`` bumps that defect's occurrence count
+    instead of creating a new row. "Other" reports carry free text and are
+    never merged. Returns ``(defect, created)``.
+    """
+    since = timezone.now() - timedelta(hours=settings.DUPLICATE_REPORT_WINDOW_HOURS)
+    with transaction.atomic():
+        # Locking the coach row serializes concurrent reports for this coach,
+        # so two passengers cannot both miss the open defect and insert twice.
+        # The lock query stays join-free: PostgreSQL refuses FOR UPDATE on the
+        # nullable side of the outer join to the depot.
+        Coach.objects.select_for_update().filter(pk=coach.pk).values_list('id').get()
+        zone_id = Coach.objects.filter(pk=coach.pk).values_list('train__depot__zone_id', flat=True).get()
+
+        existing = None
+        if defect_type.name != DefectType.OTHER:
+            existing = (
+                Defect.objects.filter(
+                    coach=coach,
+                    defect_type=defect_type,
+                    status__in=Defect.OPEN_STATUSES,
+                    date_reported__gte=since,
+                )
+                .order_by('-date_reported')
+                .first()
+            )
+
+        if existing is None:
+            defect = Defect(
+                coach=coach,
+                defect_type=defect_type,
+                custom_defect_text=custom_text,
+                reported_by=user,
+                zone_id=zone_id,
+            )
+            if image:
+                store_image(defect, image)
+            defect.save()
+            DefectReport.objects.create(defect=defect, reported_by=user)
+            adjust_status_counts({(coach.id, defect.status): 1})
+            bump('defect')
+            spike = record_defect_rate(coach.train_id, defect_type.id, defect.date_reported)
+            if spike:
+                transaction.on_commit(lambda: send_spike_alert(spike))
+            return defect, True
+
+        try:
+            with transaction.atomic():
+                DefectReport.objects.create(defect=existing, reported_by=user)
+        except IntegrityError:
+            # This passenger already reported it; nothing to count.
+            return existing, False
+
+        Defect.objects.filter(pk=existing.pk).update(occurrence_count=F('occurrence_count') + 1)
+        bump('defect')
+        if image and not existing.image:
+            store_image(existing, image)
+            existing.save(update_fields=['image'])
+        existing.refresh_from_db(fields=['occurrence_count', 'status'])
+        return existing, False
+
+
+def store_image(defect, image):
+    with IMAGE_SECONDS.time():
+        defect.image.save(image.name, image, save=False)
+
+
+def adjust_status_counts(deltas):
+    """Apply ``{(coach_id, status): delta}`` to DefectStatusCount."""
+    # Sorted so concurrent transactions take the row locks in the same order.
+    for (coach_id, status), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        counts = DefectStatusCount.objects.filter(coach_id=coach_id, status=status)
+        if not counts.update(count=F('count') + delta):
+            DefectStatusCount.objects.get_or_create(coach_id=coach_id, status=status)
+            counts.update(count=F('count') + delta)
+
+
+# ----------------------------
+# Spike detection
+# ----------------------------
+def record_defect_rate(train_id, defect_type_id, reported_at):
+    """Count one new defect against its train/type baseline.
+
+    Returns the DefectSpike created when this defect pushes the current
+    bucket over the threshold (at most one per bucket), else ``None``.
+    """
+    minutes = settings.SPIKE_BUCKET_MINUTES
+    alpha = settings.SPIKE_EWMA_ALPHA
+    bucket = bucket_start(reported_at, minutes)
+
+    baseline, _ = DefectRateBaseline.objects.select_for_update().get_or_create(
+        train_id=train_id, defect_type_id=defect_type_id, defaults={'bucket_start': bucket}
+    )
+    if bucket > baseline.bucket_start:
+        # Close the previous bucket, then decay over any empty ones since.
+        skipped = buckets_between(baseline.bucket_start, bucket, minutes) - 1
+        mean, variance = fold(baseline.mean, baseline.variance, baseline.bucket_count, alpha)
+        baseline.mean, baseline.variance = fold_empty(mean, variance, skipped, alpha)
+        baseline.buckets_seen += skipped + 1
+        baseline.bucket_start = bucket
+        baseline.bucket_count = 0
+    baseline.bucket_count += 1
+
+    spike = None
+    score = z_score(baseline.bucket_count, baseline.mean, baseline.variance)
+    if (
+        baseline.alerted_bucket != baseline.bucket_start
+        and baseline.buckets_seen >= settings.SPIKE_WARMUP_BUCKETS
+        and baseline.bucket_count >= settings.SPIKE_MIN_COUNT
+        and score >= settings.SPIKE_Z_THRESHOLD
+    ):
+        baseline.alerted_bucket = baseline.bucket_start
+        spike = DefectSpike.objects.create(
+            train_id=train_id,
+            defect_type_id=defect_type_id,
+            bucket_start=baseline.bucket_start,
+            count=baseline.bucket_count,
+            expected=baseline.mean,
+            z_score=score,
+        )
+    baseline.save()
+    return spike
+
+
+# ----------------------------
+# Work-order claiming
+# ----------------------------
+def unclaimed(now, user=None):
+    """Q for defects with no live lease (or, given ``user``, leased to them)."""
+    q = Q(claimed_by__isnull=True) | Q(claim_expires_at__lte=now)
+    if user is not None:
+        q |= Q(claimed_by=user)
+    return q
+
+
+def claim_defects(user, limit, train_id=None):
+    """Lease up to ``limit`` open defects in ``user``'s zone/depot, most-reported and oldest first.
+
+    Rows another worker is claiming at the same moment are skipped rather than
+    waited on (``SKIP LOCKED``), so concurrent callers get disjoint batches.
+    Returns ``(defect_ids, lease_expires_at)``.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(minutes=settings.WORK_ORDER_LEASE_MINUTES)
+    with transaction.atomic():
+        queue = scope_defects(
+            Defect.objects.filter(unclaimed(now), status__in=Defect.OPEN_STATUSES), staff_scope(user)
+        )
+        if train_id:
+            queue = queue.filter(coach__train_id=train_id)
+        defect_ids = list(
+            queue.select_for_update(skip_locked=True, of=('self',))
+            .order_by('-occurrence_count', 'date_reported')
+            .values_list('id', flat=True)[:limit]
+        )
+        Defect.objects.filter(id__in=defect_ids).update(claimed_by=user, claim_expires_at=expires_at)
+        if defect_ids:
+            bump('defect')
+    return defect_ids, expires_at
+
+
+def release_defects(user, defect_ids):
+    """Hand ``user``'s claims on ``defect_ids`` back to the queue."""
+    released = Defect.objects.filter(id__in=defect_ids, claimed_by=user).update(
+        claimed_by=None, claim_expires_at=None
+    )
+    if released:
+        bump('defect')
+    return released
+
+
+# ----------------------------
+# Status transitions
+# ----------------------------
+def transition_defects(defect_ids, new_status, user=None):
+    """Move defects to ``new_status`` where ``Defect.TRANSITIONS`` allows it.
+
+    The status update, the event log rows and the SLA aggregates are written
+    in one transaction. Defects outside ``user``'s zone/depot or leased to
+    someone else are left alone; resolving a defect ends its lease. Returns
+    ``{defect_id: previous_status}`` for the defects that actually changed.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = Defect.objects.select_for_update(of=('self',)).filter(id__in=defect_ids)
+        if user is not None:
+            rows = scope_defects(rows.filter(unclaimed(now, user)), staff_scope(user))
+        rows = rows.values_list('id', 'status', 'date_reported', 'coach_id', 'coach__train_id', 'coach__coach_type')
+
+        previous_statuses = {}
+        ids_by_status = defaultdict(list)
+        durations = defaultdict(list)
+        status_counts = Counter()
+        for defect_id, status, date_reported, coach_id, train_id, coach_type in rows:
+            if new_status not in Defect.TRANSITIONS.get(status, []):
+                continue
+            previous_statuses[defect_id] = status
+            ids_by_status[status].append(defect_id)
+            durations[(train_id, coach_type)].append((now - date_reported).total_seconds())
+            status_counts[(coach_id, status)] -= 1
+            status_counts[(coach_id, new_status)] += 1
+
+        # One conditional UPDATE per source status instead of a save() per row.
+        changes = {'status': new_status}
+        if new_status not in Defect.OPEN_STATUSES:
+            changes.update(claimed_by=None, claim_expires_at=None)
+        for status, ids in ids_by_status.items():
+            Defect.objects.filter(id__in=ids, status=status).update(**changes)
+
+        DefectStatusEvent.objects.bulk_create([
+            DefectStatusEvent(
+                defect_id=defect_id,
+                from_status=status,
+                to_status=new_status,
+                changed_by=user,
+                created_at=now,
+            )
+            for defect_id, status in previous_statuses.items()
+        ])
+        adjust_status_counts(status_counts)
+        if previous_statuses:
+            bump('defect')
+
+        metric = SLA_METRICS.get(new_status)
+        if metric:
+            record_sla(metric, durations)
+
+    return previous_statuses
+
+
+def record_sla(metric, durations):
+    """Fold new durations into the per-train/coach-type aggregates."""
+    for (train_id, coach_type), seconds in durations.items():
+        stats, _ = DefectSLAStats.objects.select_for_update().get_or_create(
+            train_id=train_id, coach_type=coach_type, metric=metric
+        )
+        stats.count += len(seconds)
+        stats.total_seconds += sum(seconds)
+        add_to_sketch(stats.sketch, seconds)
+        stats.save(update_fields=['count', 'total_seconds', 'sketch'])
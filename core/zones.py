@@ -0,0 +1,98 @@
+from collections import defaultdict
+
+from django.db.models import Sum
+
+from .fragments import bump
+from .models import Defect, DefectStatusCount, StaffProfile
+
+FLEET = (None, None)
+
+
+# ----------------------------
+# Per-user scope
+# ----------------------------
+def staff_scope(user):
+    """``(zone_id, depot_id)`` the user works in; ``(None, None)`` for the whole fleet.
+
+    Looked up once per request and kept on the user object.
+    """
+    if not user.is_authenticated:
+        return FLEET
+    if not hasattr(user, '_staff_scope'):
+        row = StaffProfile.objects.filter(user_id=user.pk).values_list('zone_id', 'depot_id').first()
+        user._staff_scope = row or FLEET
+    return user._staff_scope
+
+
+def scope_key(scope):
+    """Cache namespace for a scope: ``fleet``, ``z3`` or ``z3-d7``."""
+    zone_id, depot_id = scope
+    if depot_id:
+        return f"z{zone_id}-d{depot_id}"
+    return f"z{zone_id}" if zone_id else 'fleet'
+
+
+def scope_defects(queryset, scope, defect_path=''):
+    """Limit a queryset of (or reaching through ``defect_path``) Defects to a scope.
+
+    The zone filter comes first so it leads the defect indexes.
+    """
+    zone_id, depot_id = scope
+    if zone_id:
+        queryset = queryset.filter(**{f'{defect_path}zone_id': zone_id})
+    if depot_id:
+        queryset = queryset.filter(**{f'{defect_path}coach__train__depot_id': depot_id})
+    return queryset
+
+
+def scope_trains(queryset, scope, train_path=''):
+    """Limit any queryset reaching Train through ``train_path`` (e.g. ``'train__'``)."""
+    zone_id, depot_id = scope
+    if depot_id:
+        return queryset.filter(**{f'{train_path}depot_id': depot_id})
+    if zone_id:
+        return queryset.filter(**{f'{train_path}depot__zone_id': zone_id})
+    return queryset
+
+
+def scope_depots(depots, scope):
+    zone_id, depot_id = scope
+    if depot_id:
+        return depots.filter(id=depot_id)
+    return depots.filter(zone_id=zone_id) if zone_id else depots
+
+
+# ----------------------------
+# Ownership changes and rollups
+# ----------------------------
+def sync_train_zone(train):
+    """Re-stamp a train's defects after it moved depot (or got its first one)."""
+    zone_id = train.depot.zone_id if train.depot_id else None
+    moved = Defect.objects.filter(coach__train=train).exclude(zone_id=zone_id).update(zone_id=zone_id)
+    if moved:
+        bump('defect')
+    return moved
+
+
+def zone_rollup(scope=FLEET):
+    """Hot-table defects per zone from DefectStatusCount, busiest zone first.
+
+    ``counts`` follow ``Defect.STATUSES``; trains without a depot are grouped
+    under ``'-'``.
+    """
+    counts = scope_trains(DefectStatusCount.objects.all(), scope, 'coach__train__')
+    rows = (
+        counts.values_list('coach__train__depot__zone__code', 'status')
+        .annotate(total=Sum('count'))
+        .order_by()
+    )
+    zones = defaultdict(lambda: dict.fromkeys(Defect.STATUSES, 0))
+    for code, status, total in rows:
+        zones[code or '-'][status] = total
+    return sorted(
+        (
+            {'zone': code, 'counts': list(statuses.values()), 'total': sum(statuses.values())}
+            for code, statuses in zones.items()
+        ),
+        key=lambda row: -row['total'],
+    )
@@ -0,0 +1,44 @@
+import os
+import shutil
+
+# Workers write Prometheus samples to this directory; /metrics/ merges them.
+# prometheus_client reads it on import, so it is set before the import below.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/smartcoach-metrics')
+# A preloaded app creates its metric files before on_starting runs.
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+from prometheus_client import multiprocess  # noqa: E402
+
+# Import the app once in the master so workers fork with Django set up, the URL
+# resolvers compiled and the templates cached (see when_ready). Code changes
+# then need a restart rather than a HUP. GUNICORN_PRELOAD=0 turns it off.
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+
+def log_warm_up(log, who, timings):
+    log.info("Warm-up in %s: %s", who, ', '.join(f"{step} {seconds * 1000:.0f} ms" for step, seconds in timings.items()))
+
+
+def on_starting(server):
+    # Samples left by a previous master would be merged into the new totals.
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from core.warmup import warm_up
+
+        # No database connections here: forked workers would share them.
+        log_warm_up(server.log, 'master', warm_up(databases=False))
+
+
+def post_worker_init(worker):
+    from core.warmup import warm_up
+
+    log_warm_up(worker.log, f'worker {worker.pid}', warm_up())
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)